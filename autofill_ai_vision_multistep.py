@@ -9,10 +9,15 @@ import re
 import time
 import os
 import json
+import argparse
 import logging
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import multiprocessing
 from typing import Dict, List, Optional, Tuple, Union, Any, Callable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from enum import Enum
+from functools import lru_cache
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
 from playwright.sync_api import (
@@ -22,9 +27,12 @@ from playwright.sync_api import (
 )
 import random
 import urllib.parse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # --- NEW IMPORT (Ensure decision_handler.py is in the same directory) ---
-from decision_handler import DecisionHandler, check_and_handle_decision_points
+from decision_handler import DecisionHandler, DECISION_PAGE_SELECTORS
+from selector_utils import choose_class_token, is_opaque_id
 # -----------------------------------------------------------------------
 
 # ------------- CONFIG -----------------
@@ -34,20 +42,32 @@ DEFAULT_GOTO_TIMEOUT = 60000
 DEFAULT_ACTION_TIMEOUT = 15000
 DEFAULT_NAVIGATION_TIMEOUT = 45000
 INTERACTION_DELAY_MS = 250
+BLOCK_ASSETS = True # Abort image/media/font and analytics requests; forms never need them
+
+LOG_FILE_PATH = 'universal_form_filler.log'
+
+# Setup logging (called from entry points, not at import, so importers/workers don't truncate the shared log)
+def _configure_logging(path: str = LOG_FILE_PATH, mode: str = 'a') -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - [%(module)s.%(funcName)s:%(lineno)d] - %(message)s',
+        handlers=[
+            RotatingFileHandler(path, mode=mode, maxBytes=10_000_000, backupCount=3),
+            logging.StreamHandler()
+        ]
+    )
+
+def _configure_worker_logging(log_queue) -> None:
+    # Worker processes hand records to the parent's QueueListener; only the parent ever writes (and rotates) the log file.
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - [%(module)s.%(funcName)s:%(lineno)d] - %(message)s',
-    handlers=[
-        logging.FileHandler('universal_form_filler.log', mode='w'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 # ========== DATA CLASSES ==========
-class FieldType(Enum):
+class FieldType(str, Enum):
     EMAIL = "email"
     PASSWORD = "password"
     CONFIRM_PASSWORD = "confirm_password"
@@ -85,7 +105,7 @@ class FieldType(Enum):
     NEXT_BUTTON = "next_button"
     UNKNOWN = "unknown"
 
-@dataclass
+@dataclass(slots=True)
 class FormField:
     element: Locator
     field_type: FieldType
@@ -99,13 +119,13 @@ class FormField:
     iframe_selector: Optional[str] = None
     is_in_shadow_dom: bool = False
     host_selector: Optional[str] = None
+    last_interactable_at: float = 0.0  # time.monotonic() when detection last saw it visible and enabled
     
     def __lt__(self, other: 'FormField') -> bool:
-        if not isinstance(other, FormField):
-            return NotImplemented
+        # Only ever compared against other FormFields when ranking candidates.
         return self.confidence < other.confidence
 
-@dataclass
+@dataclass(slots=True)
 class FormContextData:
     form_title: str = ""
     form_purpose: str = ""
@@ -113,7 +133,7 @@ class FormContextData:
     current_step: int = 1
     total_steps: int = 1
 
-@dataclass
+@dataclass(slots=True)
 class FormAnalysisResult:
     url: str
     form_purpose: str = "unknown"
@@ -126,7 +146,7 @@ class FormAnalysisResult:
     errors: List[str] = field(default_factory=list)
     timestamp: float = field(default_factory=time.time)
 
-@dataclass
+@dataclass(slots=True)
 class FillAttemptResult:
     success: Union[bool, str] = False 
     status_message: str = ""
@@ -137,7 +157,7 @@ class FillAttemptResult:
     duration: float = 0.0
     step_number: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class OverallApplicationResult:
     application_url: str
     total_steps_provided_in_data: int = 0
@@ -180,39 +200,62 @@ def safe_get_tag_name(element: Locator) -> str:
     except Exception:
         return "unknown"
 
-def generate_robust_selector(element: Locator, tag_hint: Optional[str] = None) -> str:
+# Attributes copied verbatim (missing -> '') into FieldDetector element data; type/required/text come canonicalised from JS.
+_ELEMENT_DATA_ATTRS = (
+    'name', 'id', 'class', 'placeholder', 'aria-label', 'aria-labelledby', 'aria-describedby',
+    'role', 'autocomplete', 'value', 'data-automation-id',
+)
+_SELECTOR_ATTR_PRIORITY = ('data-testid', 'data-cy', 'id', 'name', 'data-qa', 'aria-label', 'data-automation-id')
+_SEL_ESC_RE = re.compile(r'([!"#$%&\'()*+,./:;<=>?@\[\\\]^`{|}~])')
+
+_DESCRIPTOR_ATTRS = [
+    'data-testid', 'data-cy', 'id', 'name', 'data-qa', 'aria-label', 'data-automation-id',
+    'placeholder', 'type', 'class', 'aria-labelledby', 'aria-describedby', 'role', 'autocomplete', 'value'
+]
+_ELEMENT_DESCRIPTOR_JS = ("(el, names) => el && ({tag: el.tagName.toLowerCase(), attrs: Object.fromEntries(names.map(k => [k, el.getAttribute(k)])), "
+                          "text: el.textContent, type: el.getAttribute('type') || (el.tagName === 'INPUT' ? 'text' : ''), required: !!el.required})")
+
+def fetch_element_descriptor(element: Locator) -> Dict[str, Any]:
+    # Tag, selector-relevant attributes, text and required flag in a single round-trip; {} if detached.
     try:
-        if not element.is_attached():
+        return element.evaluate(_ELEMENT_DESCRIPTOR_JS, _DESCRIPTOR_ATTRS, timeout=1000) or {}
+    except PlaywrightError:
+        return {}
+    except Exception:
+        return {}
+
+def generate_robust_selector(element: Union[Locator, Dict[str, Any]], tag_hint: Optional[str] = None) -> str:
+    try:
+        descriptor = element if isinstance(element, dict) else fetch_element_descriptor(element)
+        if not descriptor:
             return "detached_element"
-            
-        attrs_priority = ['data-testid', 'data-cy', 'id', 'name', 'data-qa', 'aria-label', 'data-automation-id']
-        tag_name = tag_hint or safe_get_tag_name(element)
+        attrs = descriptor.get('attrs') or {}
+        tag_name = tag_hint or descriptor.get('tag') or "unknown"
         
-        for attr in attrs_priority:
-            val = safe_get_attribute(element, attr)
-            if val and not val.isnumeric() and not re.match(r'^[a-f0-9-]{20,}$', val): 
-                escaped_val = re.sub(r'([!"#$%&\'()*+,./:;<=>?@\[\\\]^`{|}~])', r'\\\1', val)
+        for attr in _SELECTOR_ATTR_PRIORITY:
+            val = attrs.get(attr)
+            if val and not is_opaque_id(val): 
+                escaped_val = _SEL_ESC_RE.sub(r'\\\1', val)
                 return f"{tag_name}[{attr}='{escaped_val}']"
         
-        placeholder = safe_get_attribute(element, "placeholder")
+        placeholder = attrs.get("placeholder")
         if tag_name == "input" and placeholder:
-            input_type = safe_get_attribute(element, "type", "text") 
+            input_type = attrs.get("type") or "text"
             escaped_placeholder = placeholder[:30].replace("'", "\\'") 
             return f"input[type='{input_type}'][placeholder*='{escaped_placeholder}']"
         
-        class_name = safe_get_attribute(element, "class")
+        class_name = attrs.get("class")
         if class_name:
-            classes = [c for c in class_name.split() if len(c) > 3 and \
-                       not c.startswith(('css-', 'sc-', 'styled__', 'style-', 'ember', 'm-', 'p-', 'w-', 'h-')) and \
-                       c not in ['input', 'form-control', 'field', 'button', 'label', 'active', 'focus']]
-            if classes:
-                return f"{tag_name}.{classes[0]}" 
+            class_token = choose_class_token(class_name)
+            if class_token:
+                return f"{tag_name}.{class_token}" 
                 
         return tag_name if tag_name != "unknown" else "unknown_selector"
     except Exception as e:
         logger.debug(f"Error generating robust selector: {e}")
         return "unknown_selector_error"
 
+@lru_cache(maxsize=4096)
 def get_domain(url: str) -> str: 
     try:
         parsed_url = urllib.parse.urlparse(url)
@@ -221,196 +264,322 @@ def get_domain(url: str) -> str:
         logger.warning(f"Could not parse domain from URL: {url}")
         return "unknown_domain"
 
+# Marks the first visible+enabled match browser-side so probing a selector costs one round-trip
+# instead of .all() plus is_visible()/is_enabled() per element. Clears stale marks first.
+_PICK_INTERACTABLE_JS = """(els, excludeKeywords) => {
+    document.querySelectorAll('[data-af-pick]').forEach(e => e.removeAttribute('data-af-pick'));
+    for (const el of els) {
+        const r = el.getBoundingClientRect();
+        if (r.width <= 0 || r.height <= 0 || el.disabled) continue;
+        if (getComputedStyle(el).visibility === 'hidden') continue;
+        if (excludeKeywords.length) {
+            const haystack = ((el.textContent || '') + ' ' + (el.getAttribute('aria-label') || '')).toLowerCase();
+            if (excludeKeywords.some(k => haystack.includes(k))) continue;
+        }
+        el.setAttribute('data-af-pick', '1');
+        return true;
+    }
+    return false;
+}"""
+PICKED_ELEMENT_SELECTOR = "[data-af-pick='1']"
+
+_INTERACTABLE_JS = "el => { const r = el.getBoundingClientRect(); return r.width > 0 && r.height > 0 && !el.disabled && getComputedStyle(el).visibility !== 'hidden'; }"
+
+def is_interactable(element: Locator, timeout_ms: int = 500) -> bool:
+    # Visible + enabled in one round-trip (same rules as the picker) instead of is_visible() then is_enabled().
+    try:
+        return bool(element.evaluate(_INTERACTABLE_JS, timeout=timeout_ms))
+    except PlaywrightError:
+        return False
+    except Exception:
+        return False
+
+_FIELD_EVENTS_JS = """el => {
+    for (const name of ['input', 'change', 'blur'])
+        el.dispatchEvent(new Event(name, {bubbles: true, cancelable: true, composed: true}));
+}"""
+
+def dispatch_field_events(element: Locator) -> None:
+    # input/change/blur in one round-trip; same event init Playwright's dispatch_event uses.
+    try: element.evaluate(_FIELD_EVENTS_JS)
+    except PlaywrightError: pass
+
+def find_first_interactable(page: Page, selectors: List[str], exclude_keywords: Tuple[str, ...] = ()) -> Optional[str]:
+    # Selectors use Playwright pseudo-classes (:has-text, :visible), so they are resolved by the
+    # locator engine via evaluate_all rather than document.querySelectorAll.
+    for selector in selectors:
+        try:
+            if page.locator(selector).evaluate_all(_PICK_INTERACTABLE_JS, list(exclude_keywords)):
+                return selector
+        except PlaywrightError as e:
+            logger.debug(f"Error probing selector {selector}: {e}")
+        except Exception as e:
+            logger.debug(f"Generic error probing selector {selector}: {e}")
+    return None
+
+# Streaming connections never "finish", and a request still open after this long is treated as
+# long-polling rather than page work, so neither can hold the page out of idle indefinitely.
+_IDLE_IGNORED_RESOURCE_TYPES = frozenset({'websocket', 'eventsource'})
+_STALE_REQUEST_S = 5.0
+
+class NetworkIdleTracker:
+    """Tracks in-flight requests via page events; idle once nothing is pending and idle_ms have passed quietly.
+    Stands in for wait_for_load_state("networkidle"), which never settles on pages with beacons or long-polling."""
+    def __init__(self, page: Page):
+        self.page = page
+        self._pending: Dict[Any, float] = {}
+        self._last_activity = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _on_request(self, request) -> None:
+        if request.resource_type in _IDLE_IGNORED_RESOURCE_TYPES: return
+        self._last_activity = self._pending[request] = time.monotonic()
+
+    def _on_done(self, request) -> None:
+        if self._pending.pop(request, None) is not None: self._last_activity = time.monotonic()
+
+    def detach(self) -> None:
+        for event, handler in (("request", self._on_request), ("requestfinished", self._on_done), ("requestfailed", self._on_done)):
+            try: self.page.remove_listener(event, handler)
+            except Exception: pass
+
+    def wait_for_idle(self, idle_ms: int = 500, timeout_ms: int = 8000) -> bool:
+        # Listener callbacks are delivered while Playwright is waiting, so poll with wait_for_timeout.
+        deadline = time.monotonic() + timeout_ms / 1000
+        try:
+            while True:
+                now = time.monotonic()
+                if (now - self._last_activity) * 1000 >= idle_ms and all(now - t > _STALE_REQUEST_S for t in self._pending.values()):
+                    return True
+                if now >= deadline: return False
+                self.page.wait_for_timeout(100)
+        except PlaywrightError:
+            return False
+
+def wait_for_network_idle(page: Page, idle_ms: int = 500, timeout_ms: int = 8000) -> bool:
+    # One-off wait; requests already in flight when it starts are not seen.
+    tracker = NetworkIdleTracker(page)
+    try: return tracker.wait_for_idle(idle_ms, timeout_ms)
+    finally: tracker.detach()
+
+def save_debug_screenshot(page: Page, name: str, full_page: bool = False) -> bool:
+    # Viewport JPEGs are far cheaper to capture and encode than full-page PNGs; keep full_page for canonical artifacts.
+    path = f"{name}.png" if full_page else f"{name}.jpg"
+    try:
+        if full_page: page.screenshot(path=path, full_page=True)
+        else: page.screenshot(path=path, type="jpeg", quality=70)
+        logger.info(f"Screenshot saved: {path}")
+        return True
+    except Exception as ss_err:
+        logger.error(f"Failed to save screenshot {path}: {ss_err}")
+        return False
+
 # ========== PAGE NAVIGATION HELPERS ==========
+# Each family is probed as one comma-joined selector: a single query, candidates in DOM order.
+_APPLY_SELECTORS = (
+    "button:has-text('Apply')", "a:has-text('Apply')", 
+    "button:has-text('Apply Now')", "a:has-text('Apply Now')",
+    "button:has-text('Apply for this job')", "a:has-text('Apply for this job')",
+    "[data-automation-id*='apply']", "[aria-label*='apply' i]", 
+    "[data-uxi-element-id*='apply']",
+    "[data-automation-id='jobdetails-applybutton']", 
+    "[data-testid='JobDetailsApplyButton']", 
+    "button[name='Apply']",
+)
+_EMAIL_SELECTORS = (
+    "[data-automation-id='email'], [data-automation-id='username']", 
+    "input[type='email']", "input[name*='email'], input[id*='email']",
+    "input[name*='username'], input[id*='username']",
+    "input[placeholder*='email' i]", "input[placeholder*='username' i]",
+    "input[aria-label*='email' i]", "input[aria-label*='username' i]",
+)
+_NEXT_BUTTON_SELECTORS = (
+    "button:has-text('Next')", "button:has-text('Continue')",
+    "input[type='submit'][value*='Next' i]", "input[type='submit'][value*='Continue' i]",
+)
+_PASSWORD_SELECTORS = (
+    "[data-automation-id='password']", 
+    "input[type='password']",
+    "input[name*='password' i]", "input[id*='password' i]",
+    "input[placeholder*='password' i]", "input[aria-label*='password' i]",
+)
+_SIGNIN_SELECTORS = (
+    "[data-automation-id='signInSubmitButton']", 
+    "button[type='submit']",
+    "button:has-text('Sign In')", "button:has-text('Log In')",
+    "button:has-text('Submit')", "button:has-text('Continue')", 
+    "input[type='submit'][value*='Sign In' i]", "input[type='submit'][value*='Log In' i]",
+)
+_CREATE_ACCOUNT_SELECTORS = (
+    "a:has-text('Create Account')", "button:has-text('Create Account')",
+    "a:has-text('Sign Up')", "button:has-text('Sign Up')",
+    "a:has-text('Register')", "button:has-text('Register')",
+    "[data-automation-id='createAccount']",
+)
+_APPLY_SELECTOR = ", ".join(_APPLY_SELECTORS)
+_EMAIL_SELECTOR = ", ".join(_EMAIL_SELECTORS)
+_NEXT_BUTTON_SELECTOR = ", ".join(_NEXT_BUTTON_SELECTORS)
+_PASSWORD_SELECTOR = ", ".join(_PASSWORD_SELECTORS)
+_SIGNIN_SELECTOR = ", ".join(_SIGNIN_SELECTORS)
+_CREATE_ACCOUNT_SELECTOR = ", ".join(_CREATE_ACCOUNT_SELECTORS)
+
+_APPLY_NEGATIVE_KEYWORDS = ("save", "share", "linkedin", "indeed", "later")
+_LOGIN_URL_INDICATORS = ("signin", "login", "auth", "sso", "workday.com/auth", "accountlogin")
+_LOGIN_URL_RE = re.compile("|".join(map(re.escape, _LOGIN_URL_INDICATORS)), re.I)
+_LOGIN_CREDENTIAL_WORDS = ("password", "email", "username", "credential")
+_LOGIN_ERROR_WORDS = ("incorrect", "invalid", "failed", "try again", "doesn't match")
+_LOGIN_ALERT_SELECTOR = "[class*='error' i], [class*='alert' i], [role='alert']"
+# Text of the rendered, non-empty alerts only: many login pages ship hidden or empty error containers up front.
+_VISIBLE_ALERT_TEXT_JS = """sel => Array.from(document.querySelectorAll(sel))
+    .filter(e => e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden')
+    .map(e => (e.textContent || '').trim()).filter(Boolean).join('\\n')"""
+# Settles on navigation, or once the visible alert text differs from what was already shown before the click.
+_LOGIN_OUTCOME_JS = f"""([startUrl, alertSel, alertsBefore]) => {{
+    if (location.href !== startUrl) return true;
+    const alerts = ({_VISIBLE_ALERT_TEXT_JS})(alertSel);
+    return alerts !== '' && alerts !== alertsBefore;
+}}"""
+# Single-pass scanners over alert text instead of one substring search per word.
+_LOGIN_CREDENTIAL_RE = re.compile("|".join(map(re.escape, _LOGIN_CREDENTIAL_WORDS)))
+_LOGIN_ERROR_RE = re.compile("|".join(map(re.escape, _LOGIN_ERROR_WORDS)))
+
+_APPLY_NAVIGATION_TIMEOUT_MS = 3000
+
 def handle_job_listing_page(page: Page) -> bool:
     try:
         logger.info("Checking for Apply button on job listing page...")
-        apply_selectors = [
-            "button:has-text('Apply')", "a:has-text('Apply')", 
-            "button:has-text('Apply Now')", "a:has-text('Apply Now')",
-            "button:has-text('Apply for this job')", "a:has-text('Apply for this job')",
-            "[data-automation-id*='apply']", "[aria-label*='apply i']", 
-            "[data-uxi-element-id*='apply']",
-            "[data-automation-id='jobdetails-applybutton']", 
-            "[data-testid='JobDetailsApplyButton']", 
-            "button[name='Apply']",
-        ]
-        page.wait_for_timeout(INTERACTION_DELAY_MS * 2) 
-        
-        for selector in apply_selectors:
+        page.wait_for_timeout(INTERACTION_DELAY_MS * 2)
+        if find_first_interactable(page, [_APPLY_SELECTOR], exclude_keywords=_APPLY_NEGATIVE_KEYWORDS):
             try:
-                elements = page.locator(selector).all()
-                for element in elements:
-                    if element.is_visible(timeout=1000) and element.is_enabled(timeout=1000):
-                        text_content = (safe_get_text_content(element) or "").lower()
-                        aria_label_content = (safe_get_attribute(element, "aria-label") or "").lower()
-                        negative_keywords = ["save", "share", "linkedin", "indeed", "later"]
-                        if any(keyword in text_content for keyword in negative_keywords) or \
-                           any(keyword in aria_label_content for keyword in negative_keywords):
-                            if "apply" in text_content or "apply" in aria_label_content : 
-                                logger.debug(f"Skipping apply variant: {text_content or aria_label_content} due to keywords.")
-                            continue
-
-                        logger.info(f"Found Apply button with selector: {selector} (Text: '{text_content}')")
-                        element.scroll_into_view_if_needed(timeout=2000)
-                        page.wait_for_timeout(INTERACTION_DELAY_MS // 2) 
+                element = page.locator(PICKED_ELEMENT_SELECTOR).first
+                start_url = page.url
+                text_content = (safe_get_text_content(element) or "").lower()
+                logger.info(f"Found Apply button (Text: '{text_content}')")
+                element.scroll_into_view_if_needed(timeout=2000)
+                page.wait_for_timeout(INTERACTION_DELAY_MS // 2)
+                # Resolve as soon as a real navigation reaches 'load'; Apply buttons that only swap content
+                # in place (SPA) never navigate, so they fall back to network idle for the rest of the budget.
+                clicked = False
+                try:
+                    with page.expect_navigation(wait_until="load", timeout=_APPLY_NAVIGATION_TIMEOUT_MS):
                         element.click(timeout=DEFAULT_ACTION_TIMEOUT // 2)
-                        logger.info("Clicked Apply button, waiting for potential navigation...")
-                        try:
-                            page.wait_for_load_state("domcontentloaded", timeout=10000)
-                        except PlaywrightTimeoutError:
-                            logger.warning("Timeout waiting for domcontentloaded after Apply click. Page might be SPA or slow.")
-                        try:
-                             page.wait_for_load_state("networkidle", timeout=10000)
-                        except PlaywrightTimeoutError:
-                            logger.warning("Timeout waiting for networkidle after Apply click.")
-                        page.wait_for_timeout(INTERACTION_DELAY_MS * 4) 
-                        return True
-            except PlaywrightTimeoutError: 
-                logger.debug(f"Apply button with selector {selector} not interactable in time.")
+                        clicked = True
+                    logger.info(f"Clicked Apply button, navigated to {page.url[:100]}")
+                except PlaywrightTimeoutError:
+                    if not clicked: raise
+                    if page.url == start_url:
+                        logger.info("Clicked Apply button, no navigation; waiting for in-page update...")
+                        if not wait_for_network_idle(page, timeout_ms=10000 - _APPLY_NAVIGATION_TIMEOUT_MS):
+                            logger.warning("Timeout waiting for network idle after Apply click. Page might be SPA or slow.")
+                return True
+            except PlaywrightTimeoutError:
+                logger.debug("Apply button not interactable in time.")
             except Exception as e:
-                logger.debug(f"Error with Apply selector {selector}: {e}")
-        
+                logger.debug(f"Error clicking Apply button: {e}")
+
         logger.warning("No primary Apply button found on job listing page after trying common selectors.")
-        try:
-            page.screenshot(path="debug_no_apply_button_found.png", full_page=True)
-            logger.info("Screenshot saved: debug_no_apply_button_found.png")
-        except Exception as ss_err:
-            logger.error(f"Failed to save no_apply_button screenshot: {ss_err}")
+        save_debug_screenshot(page, "debug_no_apply_button_found")
         return False
     except Exception as e:
         logger.error(f"Error handling job listing page: {e}", exc_info=True)
         return False
 
+def _wait_for_visible(page: Page, selector: str, timeout_ms: int) -> bool:
+    try:
+        page.locator(selector).first.wait_for(state="visible", timeout=timeout_ms)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug(f"Timed out waiting for '{selector[:60]}' to become visible.")
+        return False
+
 def handle_login_page(page: Page, email: str, password: str) -> bool:
     try:
-        current_url_lower = page.url.lower()
-        logger.info(f"Checking if on login page... Current URL: {current_url_lower[:100]}")
-        login_indicators = ["signin", "login", "auth", "sso", "workday.com/auth", "accountlogin"]
+        current_url = page.url
+        logger.info(f"Checking if on login page... Current URL: {current_url[:100]}")
         has_email_field = page.locator("input[type='email'], input[name*='email'], input[id*='email'], [data-automation-id='email']").count() > 0
         has_password_field = page.locator("input[type='password'], input[name*='password'], input[id*='password'], [data-automation-id='password']").count() > 0
 
-        if not (any(indicator in current_url_lower for indicator in login_indicators) or (has_email_field and has_password_field)):
+        if not (_LOGIN_URL_RE.search(current_url) or (has_email_field and has_password_field)):
             logger.info("Not definitively on a login page based on URL or initial field scan.")
             return False
             
         logger.info("Detected potential login page, attempting to fill credentials...")
-        page.wait_for_timeout(INTERACTION_DELAY_MS * 3) 
-        email_selectors = [
-            "[data-automation-id='email'], [data-automation-id='username']", 
-            "input[type='email']", "input[name*='email'], input[id*='email']",
-            "input[name*='username'], input[id*='username']",
-            "input[placeholder*='email' i]", "input[placeholder*='username' i]",
-            "input[aria-label*='email' i]", "input[aria-label*='username' i]",
-        ]
+        _wait_for_visible(page, _EMAIL_SELECTOR, 5000)
         email_filled = False
-        for selector in email_selectors:
+        if find_first_interactable(page, [_EMAIL_SELECTOR]):
             try:
-                elements = page.locator(selector).all()
-                for email_field in elements:
-                    if email_field.is_visible(timeout=500) and email_field.is_enabled(timeout=500):
-                        logger.info(f"Found email field with selector part: {selector}")
-                        email_field.scroll_into_view_if_needed(timeout=1000)
-                        email_field.click(delay=random.randint(30,80))
-                        email_field.fill("") 
-                        email_field.type(email, delay=random.randint(40, 120))
-                        email_filled = True
-                        break
-                if email_filled: break
-            except Exception: continue
+                email_field = page.locator(PICKED_ELEMENT_SELECTOR).first
+                logger.info("Found email field.")
+                email_field.scroll_into_view_if_needed(timeout=1000)
+                email_field.click(delay=random.randint(30,80))
+                email_field.fill("") 
+                email_field.type(email, delay=random.randint(40, 120))
+                email_filled = True
+            except Exception as e: logger.debug(f"Error filling email field: {e}")
             
         if not email_filled:
             logger.warning("Could not find or fill email/username field on login page.")
             return False
             
-        next_button_selectors = [
-            "button:has-text('Next' i)", "button:has-text('Continue' i)",
-            "input[type='submit'][value*='Next' i]", "input[type='submit'][value*='Continue' i]"
-        ]
         next_clicked = False
-        for selector in next_button_selectors:
+        if find_first_interactable(page, [_NEXT_BUTTON_SELECTOR]):
             try:
-                elements = page.locator(selector).all()
-                for next_button in elements:
-                     if next_button.is_visible(timeout=500) and next_button.is_enabled(timeout=500):
-                        logger.info("Found Next/Continue button after email, clicking...")
-                        next_button.click(delay=random.randint(50,100))
-                        page.wait_for_timeout(INTERACTION_DELAY_MS * 8) 
-                        next_clicked = True
-                        break
-                if next_clicked: break
-            except Exception: continue
-
-        password_selectors = [
-            "[data-automation-id='password']", 
-            "input[type='password']",
-            "input[name*='password' i]", "input[id*='password' i]",
-            "input[placeholder*='password' i]", "input[aria-label*='password' i]",
-        ]
+                logger.info("Found Next/Continue button after email, clicking...")
+                page.locator(PICKED_ELEMENT_SELECTOR).first.click(delay=random.randint(50,100))
+                _wait_for_visible(page, _PASSWORD_SELECTOR, 5000)
+                next_clicked = True
+            except Exception as e: logger.debug(f"Error clicking Next/Continue after email: {e}")
+
         password_filled = False
-        for selector in password_selectors:
+        if find_first_interactable(page, [_PASSWORD_SELECTOR]):
             try:
-                elements = page.locator(selector).all()
-                for password_field in elements:
-                    if password_field.is_visible(timeout=500) and password_field.is_enabled(timeout=500):
-                        logger.info(f"Found password field with selector part: {selector}")
-                        password_field.scroll_into_view_if_needed(timeout=1000)
-                        password_field.click(delay=random.randint(30,80))
-                        password_field.fill("") 
-                        password_field.type(password, delay=random.randint(40, 120))
-                        password_filled = True
-                        break
-                if password_filled: break
-            except Exception: continue
+                password_field = page.locator(PICKED_ELEMENT_SELECTOR).first
+                logger.info("Found password field.")
+                password_field.scroll_into_view_if_needed(timeout=1000)
+                password_field.click(delay=random.randint(30,80))
+                password_field.fill("") 
+                password_field.type(password, delay=random.randint(40, 120))
+                password_filled = True
+            except Exception as e: logger.debug(f"Error filling password field: {e}")
             
         if not password_filled:
             logger.warning("Could not find or fill password field.")
             return False if not next_clicked else True 
             
-        signin_selectors = [
-            "[data-automation-id='signInSubmitButton']", 
-            "button[type='submit']",
-            "button:has-text('Sign In' i)", "button:has-text('Log In' i)",
-            "button:has-text('Submit' i)", "button:has-text('Continue' i)", 
-            "input[type='submit'][value*='Sign In' i]", "input[type='submit'][value*='Log In' i]",
-        ]
         signin_button_clicked = False
-        for selector in signin_selectors:
+        if find_first_interactable(page, [_SIGNIN_SELECTOR]):
             try:
-                elements = page.locator(selector).all()
-                for signin_button in elements:
-                    if signin_button.is_visible(timeout=1000) and signin_button.is_enabled(timeout=1000):
-                        logger.info(f"Found sign-in button with selector part: {selector}")
-                        signin_button.scroll_into_view_if_needed(timeout=1000)
-                        signin_button.click(delay=random.randint(50,150))
-                        logger.info("Clicked sign-in button, waiting for navigation...")
-                        signin_button_clicked = True
-                        break
-                if signin_button_clicked: break
-            except Exception: continue
+                signin_button = page.locator(PICKED_ELEMENT_SELECTOR).first
+                logger.info("Found sign-in button.")
+                signin_button.scroll_into_view_if_needed(timeout=1000)
+                pre_signin_url = page.url
+                try: alerts_before_signin = page.evaluate(_VISIBLE_ALERT_TEXT_JS, _LOGIN_ALERT_SELECTOR)
+                except PlaywrightError: alerts_before_signin = ""
+                signin_button.click(delay=random.randint(50,150))
+                logger.info("Clicked sign-in button, waiting for navigation...")
+                signin_button_clicked = True
+            except Exception as e: logger.debug(f"Error clicking sign-in button: {e}")
 
         if not signin_button_clicked:
             logger.warning("Could not find or click sign-in button.")
             return False
 
+        if not wait_for_network_idle(page, timeout_ms=15000):
+            logger.warning("Timeout waiting for network idle after sign-in click.")
         try:
-            page.wait_for_load_state("networkidle", timeout=15000)
+            page.wait_for_function(_LOGIN_OUTCOME_JS, arg=[pre_signin_url, _LOGIN_ALERT_SELECTOR, alerts_before_signin], polling=100, timeout=10000)
         except PlaywrightTimeoutError:
-            logger.warning("Timeout waiting for networkidle after sign-in click.")
-        page.wait_for_timeout(INTERACTION_DELAY_MS * 10) 
+            logger.debug("No navigation or alert after sign-in within timeout.")
         
-        final_url_lower = page.url.lower()
-        if not any(indicator in final_url_lower for indicator in login_indicators) or final_url_lower != current_url_lower:
-            error_messages = ["incorrect", "invalid", "failed", "try again", "doesn't match"]
-            page_text = page.content().lower() # Potential performance hit
-            if any(err_msg in page_text for err_msg in error_messages):
-                login_error_locator = page.locator("[class*='error' i], [class*='alert' i], [role='alert']")
-                if login_error_locator.count() > 0:
-                    for i in range(login_error_locator.count()):
-                        err_text = (login_error_locator.nth(i).text_content() or "").lower()
-                        if any(msg_part in err_text for msg_part in ["password", "email", "username", "credential"]):
-                            logger.warning(f"Login failed, error message found: {err_text}")
-                            return False
+        final_url = page.url
+        if not _LOGIN_URL_RE.search(final_url) or final_url != current_url:
+            alert_texts = page.evaluate(_VISIBLE_ALERT_TEXT_JS, _LOGIN_ALERT_SELECTOR).split('\n')
+            for err_text in (a.lower() for a in alert_texts):
+                if _LOGIN_CREDENTIAL_RE.search(err_text) and _LOGIN_ERROR_RE.search(err_text):
+                    logger.warning(f"Login failed, error message found: {err_text}")
+                    return False
             logger.info("Login appears successful - navigated away or page content changed from login indicators.")
             return True
         else:
@@ -422,20 +591,9 @@ def handle_login_page(page: Page, email: str, password: str) -> bool:
 
 def check_for_create_account_option(page: Page) -> bool:
     try:
-        create_account_selectors = [
-            "a:has-text('Create Account' i)", "button:has-text('Create Account' i)",
-            "a:has-text('Sign Up' i)", "button:has-text('Sign Up' i)",
-            "a:has-text('Register' i)", "button:has-text('Register' i)",
-            "[data-automation-id='createAccount']"
-        ]
-        for selector in create_account_selectors:
-            try:
-                elements = page.locator(selector).all()
-                for element in elements:
-                    if element.is_visible(timeout=500):
-                        logger.info(f"Found 'Create Account' option with text/selector: '{safe_get_text_content(element).strip()}' / {selector}")
-                        return True
-            except Exception: continue
+        if find_first_interactable(page, [_CREATE_ACCOUNT_SELECTOR]):
+            logger.info(f"Found 'Create Account' option with text: '{safe_get_text_content(page.locator(PICKED_ELEMENT_SELECTOR).first).strip()}'")
+            return True
         return False
     except Exception as e:
         logger.debug(f"Error checking for create account: {e}")
@@ -459,14 +617,17 @@ class AntiDetectionManager:
             self.random_delay(100, 200)
             element.fill("") 
             
-            for idx, char in enumerate(text):
-                element.type(char, delay=random.randint(min_char_delay_ms, max_char_delay_ms))
-                if idx > 0 and idx % random.randint(8, 15) == 0: 
+            # keyboard.type interleaves the per-key delay browser-side; only return to Python
+            # between chunks to insert the occasional longer "thinking" pause.
+            idx = 0
+            while idx < len(text):
+                chunk = text[idx:idx + random.randint(8, 15)]
+                self.page.keyboard.type(chunk, delay=random.randint(min_char_delay_ms, max_char_delay_ms))
+                idx += len(chunk)
+                if idx < len(text):
                     self.page.wait_for_timeout(random.uniform(0.05, 0.15) * 1000)
             
-            for event_name in ["input", "change", "blur"]:
-                try: element.dispatch_event(event_name)
-                except PlaywrightError: pass 
+            dispatch_field_events(element)
         except PlaywrightError as e:
             logger.warning(f"Anti-detection: PlaywrightError during human_type: {e}. Falling back to fill.")
             try: 
@@ -477,149 +638,263 @@ class AntiDetectionManager:
         except Exception as e_gen:
             logger.error(f"Anti-detection: Generic error during human_type: {e_gen}")
 
+# Installed once per context via add_init_script so every new document (including after navigations)
+# already has the detector; observes `document` because documentElement may not exist yet at init time.
+_STABILITY_OBSERVER_JS = """
+if (!window.stabilityDetector) {
+    window.stabilityDetector = {
+        mutationCount: 0, criticalMutations: 0, lastCriticalMutation: Date.now(),
+        stabilityWindowMs: 1500, observer: null, timerId: null,
+        isCriticalMutation: function(mutation) {
+            if (mutation.type === 'childList' && (mutation.addedNodes.length > 0 || mutation.removedNodes.length > 0)) return true;
+            if (mutation.type === 'attributes') {
+                const target = mutation.target;
+                if (target && typeof target.matches === 'function' &&
+                    target.matches('input,select,textarea,button,[role="button"],[role="textbox"],[role="combobox"],[role="listbox"],[role="option"],[role="checkbox"],[role="radio"]')) {
+                    if (['disabled', 'hidden', 'style', 'class', 'value', 'checked', 'selected', 'readonly', 'aria-disabled', 'aria-hidden'].includes(mutation.attributeName)) return true;
+                }
+                if (mutation.attributeName === 'style' && (mutation.oldValue || target.style.display === 'none' || target.style.visibility === 'hidden')) return true;
+            }
+            return false;
+        },
+        processMutations: function(mutationsList) {
+            this.mutationCount += mutationsList.length;
+            let criticalFound = false;
+            for(let mutation of mutationsList) {
+                if (this.isCriticalMutation(mutation)) {
+                    this.lastCriticalMutation = Date.now(); this.criticalMutations++; criticalFound = true; break; 
+                }
+            }
+        },
+        startObserving: function(stabilityWindow = 1500) {
+            this.stabilityWindowMs = stabilityWindow; this.lastCriticalMutation = Date.now(); 
+            if (this.observer) this.observer.disconnect();
+            this.observer = new MutationObserver(this.processMutations.bind(this));
+            this.observer.observe(document, {
+                childList: true, subtree: true, attributes: true, 
+                attributeOldValue: true, characterData: false 
+            });
+        },
+        isStable: function() {
+            const quietPeriod = Date.now() - this.lastCriticalMutation;
+            return quietPeriod >= this.stabilityWindowMs;
+        },
+        getMetrics: function() { return {}; }, stopObserving: function() { if(this.observer) {this.observer.disconnect(); this.observer=null;} }
+    };
+    window.stabilityDetector.startObserving();
+}
+"""
+# Re-seeds the quiet window for this wait; installs the detector first on pages created outside our context.
+_STABILITY_SEED_JS = "(windowMs) => { if (!window.stabilityDetector) { " + _STABILITY_OBSERVER_JS + " } window.stabilityDetector.startObserving(windowMs); }"
+_STABILITY_PREDICATE_JS = "() => !window.stabilityDetector || typeof window.stabilityDetector.isStable !== 'function' || window.stabilityDetector.isStable()"
+
 class DOMStabilityManager:
     def __init__(self, page: Page):
         self.page = page
-        self._observer_script_injected = False
-        
-    def _inject_stability_observer_script(self):
-        if self._observer_script_injected:
-            try:
-                self.page.evaluate("if(window.stabilityDetector) { window.stabilityDetector.lastCriticalMutation = Date.now(); window.stabilityDetector.startObserving(window.stabilityDetector.stabilityWindowMs); }")
-            except PlaywrightError: 
-                self._observer_script_injected = False 
-            except Exception as e:
-                 logger.warning(f"Error re-initializing stability observer: {e}")
-                 self._observer_script_injected = False
-            if self._observer_script_injected: return 
+        self._page_closed = page.is_closed()
+        page.on("close", self._on_page_close)
+        self.network = NetworkIdleTracker(page)
 
-        try:
-            self.page.evaluate("""
-                window.stabilityDetector = {
-                    mutationCount: 0, criticalMutations: 0, lastCriticalMutation: Date.now(),
-                    stabilityWindowMs: 1500, observer: null, timerId: null,
-                    isCriticalMutation: function(mutation) {
-                        if (mutation.type === 'childList' && (mutation.addedNodes.length > 0 || mutation.removedNodes.length > 0)) return true;
-                        if (mutation.type === 'attributes') {
-                            const target = mutation.target;
-                            if (target && typeof target.matches === 'function' &&
-                                target.matches('input,select,textarea,button,[role="button"],[role="textbox"],[role="combobox"],[role="listbox"],[role="option"],[role="checkbox"],[role="radio"]')) {
-                                if (['disabled', 'hidden', 'style', 'class', 'value', 'checked', 'selected', 'readonly', 'aria-disabled', 'aria-hidden'].includes(mutation.attributeName)) return true;
-                            }
-                            if (mutation.attributeName === 'style' && (mutation.oldValue || target.style.display === 'none' || target.style.visibility === 'hidden')) return true;
-                        }
-                        return false;
-                    },
-                    processMutations: function(mutationsList) {
-                        this.mutationCount += mutationsList.length;
-                        let criticalFound = false;
-                        for(let mutation of mutationsList) {
-                            if (this.isCriticalMutation(mutation)) {
-                                this.lastCriticalMutation = Date.now(); this.criticalMutations++; criticalFound = true; break; 
-                            }
-                        }
-                    },
-                    startObserving: function(stabilityWindow = 1500) {
-                        this.stabilityWindowMs = stabilityWindow; this.lastCriticalMutation = Date.now(); 
-                        if (this.observer) this.observer.disconnect();
-                        this.observer = new MutationObserver(this.processMutations.bind(this));
-                        this.observer.observe(document.documentElement, {
-                            childList: true, subtree: true, attributes: true, 
-                            attributeOldValue: true, characterData: false 
-                        });
-                    },
-                    isStable: function() {
-                        const quietPeriod = Date.now() - this.lastCriticalMutation;
-                        return quietPeriod >= this.stabilityWindowMs;
-                    },
-                    getMetrics: function() { return {}; }, stopObserving: function() { if(this.observer) {this.observer.disconnect(); this.observer=null;} }
-                };
-                if(window.stabilityDetector && typeof window.stabilityDetector.startObserving === 'function') {
-                    window.stabilityDetector.startObserving();
-                }
-            """)
-            self._observer_script_injected = True
-            logger.debug("DOM Stability Intelligent Observer injected and started.")
-        except PlaywrightError as e: 
-            logger.error(f"PlaywrightError injecting DOM stability script (page might be closed/navigated): {e}")
-            self._observer_script_injected = False
-        except Exception as e_gen:
-            logger.error(f"Generic error injecting DOM stability script: {e_gen}")
-            self._observer_script_injected = False
-            
+    def _on_page_close(self, _page: Page):
+        self._page_closed = True
+        
     def wait_for_intelligent_stability(self, timeout: int = 10000, stability_check_window_ms: int = 1000) -> bool:
-        if self.page.is_closed():
+        if self._page_closed:
             logger.warning("Page closed, cannot wait for DOM stability.")
             return False
             
         logger.info(f"Waiting for intelligent DOM stability (timeout: {timeout/1000}s, window: {stability_check_window_ms/1000}s)...")
         
-        if not self._observer_script_injected:
-             self._inject_stability_observer_script()
+        try:
+            self.page.evaluate(_STABILITY_SEED_JS, stability_check_window_ms)
+            observer_ready = True
+        except Exception as e:
+            logger.warning(f"Could not start DOM stability observer (page might have changed): {e}")
+            observer_ready = False
         
-        if not self._observer_script_injected:
-            logger.warning("Observer script not injected/failed. Using networkidle + fixed delay for stability.")
-            try:
-                self.page.wait_for_load_state("networkidle", timeout=max(3000, timeout // 2))
-                self.page.wait_for_timeout(stability_check_window_ms) 
+        if not observer_ready:
+            logger.warning("Observer script not available. Using network idle for stability.")
+            if self.network.wait_for_idle(idle_ms=stability_check_window_ms, timeout_ms=max(3000, timeout // 2)):
                 return True
-            except PlaywrightTimeoutError:
-                logger.warning("Networkidle timeout during fallback stability.")
-                return False
-            except Exception as e:
-                logger.error(f"Error in fallback stability wait: {e}")
-                return False
+            logger.warning("Network idle timeout during fallback stability.")
+            return False
         
-        try:
-            self.page.evaluate(
-                f"if(window.stabilityDetector) {{ window.stabilityDetector.stabilityWindowMs = {stability_check_window_ms}; window.stabilityDetector.startObserving({stability_check_window_ms}); }}"
-            )
-        except Exception as e: 
-            logger.warning(f"Could not re-configure/restart DOM observer (page might have changed): {e}. Relying on previous start or fallback.")
-
         start_time = time.time()
         loop_count = 0
-        initial_network_idle_achieved = False
-
-        try:
-            self.page.wait_for_load_state("networkidle", timeout=timeout//3)
-            initial_network_idle_achieved = True
-            logger.debug("Initial networkidle achieved before stability loop.")
-        except PlaywrightTimeoutError:
-            logger.debug("Initial networkidle not achieved, proceeding with stability checks.")
-        except PlaywrightError: 
-             if self.page.is_closed(): return False
+        initial_network_idle_achieved = self.network.wait_for_idle(timeout_ms=timeout // 3)
+        if self._page_closed: return False
+        logger.debug(f"Initial network idle {'achieved' if initial_network_idle_achieved else 'not achieved'} before stability loop.")
 
+        # Each round is a single wait_for_function: the predicate is polled inside the browser, so
+        # Python only hears back once the observer reports a quiet window (or the budget runs out).
         while (time.time() - start_time) * 1000 < timeout:
-            if self.page.is_closed():
+            if self._page_closed:
                 logger.warning("Page closed during stability check.")
                 return False
             loop_count += 1
+            remaining_ms = max(1, int(timeout - (time.time() - start_time) * 1000))
             try:
-                is_stable = self.page.evaluate("window.stabilityDetector && typeof window.stabilityDetector.isStable === 'function' ? window.stabilityDetector.isStable() : true")
-                if is_stable:
-                    if initial_network_idle_achieved or loop_count > 3 : 
-                        try:
-                            self.page.wait_for_load_state("networkidle", timeout=stability_check_window_ms) 
-                            logger.info(f"DOM achieved intelligent stability after ~{int((time.time() - start_time)*1000)}ms in {loop_count} checks (Network calm).")
-                            return True
-                        except PlaywrightTimeoutError:
-                            logger.debug(f"DOM stable by mutation observer, but network still active. Loop: {loop_count}. Continuing wait.")
-                            self.page.evaluate("if(window.stabilityDetector) { window.stabilityDetector.lastCriticalMutation = Date.now(); }")
-                    else: 
-                         logger.info(f"DOM achieved intelligent stability (observer) after ~{int((time.time() - start_time)*1000)}ms in {loop_count} checks.")
-                         return True
+                self.page.wait_for_function(_STABILITY_PREDICATE_JS, polling=100, timeout=remaining_ms)
+                if initial_network_idle_achieved:
+                    if self.network.wait_for_idle(timeout_ms=stability_check_window_ms):
+                        logger.info(f"DOM achieved intelligent stability after ~{int((time.time() - start_time)*1000)}ms in {loop_count} checks (Network calm).")
+                        return True
+                    logger.debug(f"DOM stable by mutation observer, but network still active. Loop: {loop_count}. Continuing wait.")
+                    self.page.evaluate("if(window.stabilityDetector) { window.stabilityDetector.lastCriticalMutation = Date.now(); }")
+                else: 
+                     logger.info(f"DOM achieved intelligent stability (observer) after ~{int((time.time() - start_time)*1000)}ms in {loop_count} checks.")
+                     return True
+            except PlaywrightTimeoutError:
+                break
             except PlaywrightError as e: 
                 logger.warning(f"PlaywrightError checking DOM stability (page might have navigated/closed): {e}")
                 return False 
             except Exception as e_gen:
                 logger.error(f"Generic error in intelligent stability check loop: {e_gen}")
                 return False 
-            self.page.wait_for_timeout(250) 
             
         logger.warning(f"DOM intelligent stability timeout ({timeout/1000}s) reached after {loop_count} checks.")
         return False
 
+_FORM_ELEMENT_SELECTOR = ", ".join((
+    "input:not([type='hidden']):not([type='image'])", 
+    "select", "textarea", "button",
+    "[role='textbox']", "[role='combobox']", "[role='listbox']",
+    "[role='checkbox']", "[role='radio']", "[role='switch']", 
+    "[contenteditable='true']",
+))
+# Label and nearby text for one element, resolved in-page: aria-labelledby, then label[for], then the ancestor label.
+_FIELD_CONTEXT_JS = """(el, maxChars) => {
+    const shownText = n => (n && n.getClientRects().length && getComputedStyle(n).visibility !== 'hidden') ? (n.textContent || '').trim() : '';
+    const clip = n => n ? (n.textContent || '').slice(0, maxChars).trim() : '';
+    let label = '';
+    const labelledBy = el.getAttribute('aria-labelledby');
+    if (labelledBy) label = labelledBy.split(/\\s+/).map(id => shownText(document.getElementById(id))).filter(Boolean).join(' ');
+    if (!label && el.id) label = shownText(document.querySelector('label[for="' + CSS.escape(el.id) + '"]'));
+    if (!label) label = shownText(el.closest('label'));
+    return {label, parent_text: clip(el.parentElement), prev_sibling_text: clip(el.previousElementSibling)};
+}"""
+# Same shape as _ELEMENT_DESCRIPTOR_JS plus label/context and the element's index in the match list (for Locator.nth).
+_SCRAPE_FORM_ELEMENTS_JS = """(els, names) => {
+    const fieldContext = """ + _FIELD_CONTEXT_JS + """;
+    const out = [];
+    els.forEach((el, index) => {
+        const r = el.getBoundingClientRect();
+        if (r.width <= 0 || r.height <= 0 || getComputedStyle(el).visibility === 'hidden') return;
+        const {label, ...context} = fieldContext(el, 100);
+        out.push({index, tag: el.tagName.toLowerCase(), attrs: Object.fromEntries(names.map(k => [k, el.getAttribute(k)])),
+                  text: el.textContent, type: el.getAttribute('type') || (el.tagName === 'INPUT' ? 'text' : ''),
+                  required: !!el.required, disabled: !!el.disabled, label, context});
+    });
+    return out;
+}"""
+
+_PATTERN_GROUP_ATTRS = {
+    'names': 'name', 'labels': 'label', 'placeholders': 'placeholder', 'types': 'type',
+    'autocompletes': 'autocomplete', 'data-automation-ids': 'data-automation-id', 'texts': 'text',
+}
+_NEGATIVE_CHECK_ATTRS = ('label', 'name', 'id', 'placeholder', 'aria-label', 'text', 'data-automation-id', 'autocomplete')
+_APPLY_TEXT_RE = re.compile(r'\b(?:apply now|apply for this job|submit application|apply)\b')
+_NEXT_TEXT_RE = re.compile(r'\b(?:next|continue|proceed|step \d+|forward)\b')
+_SAVE_CONTINUE_TEXT_RE = re.compile(r'(?=.*\bsave\b)(?=.*\bcontinue\b)', re.DOTALL)
+_SUBMIT_TEXT_RE = re.compile(r'\b(?:submit|send|finish|complete|done|save & exit|save and exit|save)\b')
+# Input types whose field type is already pinned down; every other (tag, type), checkboxes and radios included, is scored against all types.
+_CANDIDATE_TYPES_BY_HTML: Dict[Tuple[str, str], frozenset] = {
+    ('input', 'email'): frozenset({FieldType.EMAIL}),
+    ('input', 'password'): frozenset({FieldType.PASSWORD}),
+    ('input', 'tel'): frozenset({FieldType.PHONE}),
+    ('input', 'file'): frozenset({FieldType.RESUME_FILE, FieldType.COVER_LETTER_FILE}),
+}
+_JOB_APP_FIELD_TYPES = frozenset({
+    FieldType.RESUME_FILE, FieldType.COVER_LETTER_FILE, FieldType.LINKEDIN,
+    FieldType.COMPANY, FieldType.JOB_TITLE, FieldType.YEARS_EXPERIENCE,
+    FieldType.SCHOOL, FieldType.DEGREE,
+})
+_LOGIN_FORM_FIELD_TYPES = frozenset({FieldType.EMAIL, FieldType.PASSWORD, FieldType.SUBMIT_BUTTON, FieldType.NEXT_BUTTON})
+_CONTACT_KEYWORDS = ("message", "comment", "query", "question", "feedback")
+_LOWERED_ATTRS = frozenset(_PATTERN_GROUP_ATTRS.values()) | frozenset(_NEGATIVE_CHECK_ATTRS) | frozenset({'value'})
+
+_STEP_RE = re.compile(r'(?:step\s*)?(\d+)\s*(?:of|\/|from)\s*(\d+)', re.IGNORECASE)
+# (css selector, counts only when visible). Visibility is checked in-page, standing in for Playwright's :visible.
+_STEP_INDICATOR_SPECS = (
+    ("[class*='step']", True), ("[class*='progress']", True), ("[class*='wizard']", True), 
+    ("[role='tablist']:has([role='tab'][aria-selected='true'])", False), 
+    (".breadcrumb li.active", False), (".pagination .active", False), 
+    ("[data-step]", True), ("[aria-current='step']", False), 
+    ("[data-automation-id*='progressBar'] li[data-automation-id*='selected']", False),
+    ("[data-automation-id*='stepIndicator']", False),
+)
+# All step-indicator selectors in one round-trip: per selector, a presence count plus text and item count of visible matches.
+_STEP_INDICATOR_JS = """(specs) => {
+    const shown = el => { const r = el.getBoundingClientRect(); return r.width > 0 && r.height > 0 && getComputedStyle(el).visibility !== 'hidden'; };
+    return specs.map(([sel, visibleOnly]) => {
+        let els;
+        try { els = Array.from(document.querySelectorAll(sel)); } catch (e) { return {present: 0, items: []}; }
+        const visible = els.filter(shown);
+        return {present: (visibleOnly ? visible : els).length,
+                items: visible.map(el => ({text: ((el.textContent || '') + ' ' + (el.getAttribute('aria-label') || '')).trim(),
+                                           itemCount: el.querySelectorAll("li, [role='tab'], div[class*='step-item']").length}))};
+    });
+}"""
+
+# Fingerprint of the form scope: markup length, element count and an FNV-1a hash of the markup.
+# Hashed in the page so the HTML itself never crosses the wire; the hash catches same-length
+# edits such as a class swap that reveals the next section of an AJAX form.
+_DOM_FINGERPRINT_JS = """(sel) => {
+    const n = document.querySelector(sel) || document.body;
+    const html = n.outerHTML;
+    let h = 0x811c9dc5;
+    for (let i = 0; i < html.length; i++) { h ^= html.charCodeAt(i); h = Math.imul(h, 0x01000193); }
+    return [html.length, n.getElementsByTagName('*').length, h >>> 0];
+}"""
+
+_DEFAULT_FIELD_PATTERNS: Dict[FieldType, Dict[str, List[str]]] = {
+    FieldType.EMAIL: {'names': [r'email', r'e-?mail', r'user-?name', r'login', r'userPrincipalName'],'labels': [r'email\s*address', r'e-?mail', r'your\s*email', r'user\s*name', r'login\s*id'],'placeholders': [r'enter\s*email', r'email', r'@', r'example@company\.com'],'types': [r'^email$'],'autocompletes': [r'email', r'username'],'data-automation-ids': [r'email', r'username', r'userid']},
+    FieldType.PASSWORD: {'names': [r'password', r'pass-?word', r'pwd', r'userPass', r'credentials\.password'],'labels': [r'password', r'pass-?word', r'pincode'],'placeholders': [r'enter\s*password', r'password'],'types': [r'^password$'],'autocompletes': [r'current-password', r'new-password'],'data-automation-ids': [r'password']},
+    FieldType.FIRST_NAME: {'names': [r'first-?name', r'f-?name', r'given-?name', r'forename', r'firstName', r'contact\.firstName'],'labels': [r'first\s*name', r'given\s*name', r'forename'],'placeholders': [r'first\s*name', r'given\s*name'],'autocompletes': [r'given-name', r'fname']},
+    FieldType.LAST_NAME: {'names': [r'last-?name', r'l-?name', r'surname', r'family-?name', r'lastName', r'contact\.lastName'],'labels': [r'last\s*name', r'surname', r'family\s*name'],'placeholders': [r'last\s*name', r'surname'],'autocompletes': [r'family-name', r'lname']},
+    FieldType.PHONE: {'names': [r'phone', r'mobile', r'cell', r'telephone', r'contact-?number', r'primaryPhone'],'labels': [r'phone', r'mobile', r'telephone', r'contact\s*number', r'phone\s*number'],'placeholders': [r'phone', r'mobile', r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', r'phone\s*number'],'types': [r'^tel$'],'autocompletes': [r'tel', r'tel-national']},
+    FieldType.COMPANY: {'names': [r'company', r'employer', r'organization', r'current-?employer', r'businessName'],'labels': [r'company', r'employer', r'organization', r'current\s*employer', r'company\s*name'],'placeholders': [r'company', r'employer', r'organization\s*name'],'autocompletes': [r'organization']},
+    FieldType.JOB_TITLE: {'names': [r'job-?title', r'position', r'role', r'title', r'currentPosition'],'labels': [r'job\s*title', r'position', r'current\s*position', r'role', r'desired\s*position'],'placeholders': [r'job\s*title', r'position', r'your\s*role'],'autocompletes': [r'organization-title']},
+    FieldType.RESUME_FILE: {'names': [r'resume', r'cv', r'curriculum', r'resume-?upload', r'cv-?upload', r'attachment'],'labels': [r'resume', r'cv', r'upload\s*resume', r'attach\s*resume', r'curriculum\s*vitae'],'types': [r'^file$'],'data-automation-ids': [r'resumeupload', r'fileuploader', r'attachCV']},
+    FieldType.ADDRESS_LINE1: {'names': [r'address(1|Line1)?', r'street', r'addr1'],'labels': [r'address\s*(line\s*1)?', r'street\s*address'],'placeholders': [r'street\s*address', r'address\s*line\s*1'],'autocompletes': [r'address-line1', r'street-address']},
+    FieldType.CITY: {'names': [r'city', r'town'],'labels': [r'city', r'town', r'suburb'],'placeholders': [r'city', r'town'],'autocompletes': [r'address-level2', r'city']},
+    FieldType.STATE: {'names': [r'state', r'province', r'region'],'labels': [r'state', r'province', r'region'],'placeholders': [r'state', r'province'],'autocompletes': [r'address-level1', r'state']},
+    FieldType.ZIP_CODE: {'names': [r'zip(-?code)?', r'postal(-?code)?', r'postcode'],'labels': [r'zip', r'postal\s*code', r'post\s*code'],'placeholders': [r'zip', r'postal\s*code', r'\d{5}(-\d{4})?'],'autocompletes': [r'postal-code', r'zip']},
+    FieldType.TEXTAREA: {'names': [r'cover-?letter', r'message', r'comment', r'additional-?info', r'summary', r'description'],'labels': [r'cover\s*letter', r'message', r'comments', r'additional\s*information', r'tell\s*us\s*more']},
+}
+
+_DEFAULT_NEGATIVE_PATTERNS: Dict[FieldType, List[str]] = {
+    FieldType.EMAIL: [r'confirm', r're-?type', r'verify', r'new\s*email', r'search', r'filter'], 
+    FieldType.PASSWORD: [r'confirm', r're-?type', r'verify', r'new\s*password', r'current\s*password', r'old\s*password'], 
+    FieldType.FIRST_NAME: [r'last', r'family', r'surname', r'middle', r'initial'],
+    FieldType.LAST_NAME: [r'first', r'given', r'middle', r'initial'],
+    FieldType.PHONE: [r'extension', r'ext\.?', r'country\s*code', r'area\s*code'], 
+}
+
+def _fuse_patterns(regexes: List[str], context: str) -> Optional[re.Pattern]:
+    valid = []
+    for regex in regexes:
+        try:
+            re.compile(regex)
+            valid.append(regex)
+        except re.error:
+            logger.warning(f"Invalid regex '{regex}' for {context}")
+    return re.compile("|".join(f"(?:{regex})" for regex in valid), re.IGNORECASE) if valid else None
+
+# One fused alternation per (field type, group): "does any pattern in the group match" is a single search.
+def _compile_field_patterns(patterns: Dict[FieldType, Dict[str, List[str]]]) -> Dict[FieldType, Dict[str, re.Pattern]]:
+    return {
+        ft: {group: fused for group, regexes in groups.items() if (fused := _fuse_patterns(regexes, f"{ft.value}/{group}"))}
+        for ft, groups in patterns.items()
+    }
+
+def _compile_negative_patterns(patterns: Dict[FieldType, List[str]]) -> Dict[FieldType, re.Pattern]:
+    return {ft: fused for ft, regexes in patterns.items() if (fused := _fuse_patterns(regexes, f"{ft.value}/negative"))}
+
+_FIELD_PATTERNS_COMPILED = _compile_field_patterns(_DEFAULT_FIELD_PATTERNS)
+_NEGATIVE_PATTERNS_COMPILED = _compile_negative_patterns(_DEFAULT_NEGATIVE_PATTERNS)
+
 # ========== FIELD DETECTOR ==========
 class FieldDetector:
     def __init__(self, page: Page, config: Dict[str, Any], filler_instance: 'UniversalFormFiller'):
@@ -629,37 +904,58 @@ class FieldDetector:
         self.field_patterns = filler_instance._get_default_field_patterns() 
         self.negative_patterns = filler_instance._get_default_negative_patterns()
         self.attribute_weights = filler_instance._get_default_attribute_weights()
+        # Default tables are compiled once at import; only custom pattern sets are compiled per instance.
+        self._compiled_field_patterns = _FIELD_PATTERNS_COMPILED if self.field_patterns is _DEFAULT_FIELD_PATTERNS \
+            else _compile_field_patterns(self.field_patterns)
+        self._compiled_negative_patterns = _NEGATIVE_PATTERNS_COMPILED if self.negative_patterns is _DEFAULT_NEGATIVE_PATTERNS \
+            else _compile_negative_patterns(self.negative_patterns)
+        # Per type: (attribute, weight, fused pattern) triples, so the scoring loop does no key mapping or weight lookups.
+        self._scoring_groups: Dict[FieldType, Tuple[Tuple[str, float, re.Pattern], ...]] = {
+            ft: tuple((attr, self.attribute_weights.get(attr, 1.0), pattern)
+                      for group, pattern in groups.items() if (attr := _PATTERN_GROUP_ATTRS.get(group)))
+            for ft, groups in self._compiled_field_patterns.items()
+        }
+        self._max_score_by_ft: Dict[FieldType, float] = {
+            ft: (sum(w for key, w in self.attribute_weights.items() if key in groups or key == 'type') + 2.0)
+            for ft, groups in self.field_patterns.items()
+        }
+        self._analysis_cache: "OrderedDict[Tuple[str, str, Tuple[int, int]], FormAnalysisResult]" = OrderedDict()
         logger.info(f"FieldDetector initialized with patterns for {len(self.field_patterns)} types.")
+
         
     def detect_all_fields_on_page(self, current_page_or_frame: Union[Page, Frame], form_selector_str: str) -> FormAnalysisResult:
+        cache_key = None
+        try:
+            fingerprint = current_page_or_frame.evaluate(_DOM_FINGERPRINT_JS, form_selector_str)
+            cache_key = (current_page_or_frame.url, form_selector_str, tuple(fingerprint))
+            if cache_key in self._analysis_cache:
+                self._analysis_cache.move_to_end(cache_key)
+                logger.info(f"Reusing field analysis for unchanged form '{form_selector_str}'.")
+                return self._analysis_cache[cache_key]
+        except Exception as e:
+            logger.debug(f"Could not fingerprint form '{form_selector_str}': {e}")
+        
+        analysis = self._analyze_fields(current_page_or_frame, form_selector_str)
+        if cache_key is not None and not analysis.errors:
+            self._analysis_cache[cache_key] = analysis
+            if len(self._analysis_cache) > 16: self._analysis_cache.popitem(last=False)
+        return analysis
+
+    def _analyze_fields(self, current_page_or_frame: Union[Page, Frame], form_selector_str: str) -> FormAnalysisResult:
         analysis = FormAnalysisResult(url=current_page_or_frame.url)
         try:
             base_locator = current_page_or_frame.locator(form_selector_str) if form_selector_str != "body" else current_page_or_frame
-            element_css_selectors = [
-                "input:not([type='hidden']):not([type='image'])", 
-                "select", "textarea", "button",
-                "[role='textbox']", "[role='combobox']", "[role='listbox']",
-                "[role='checkbox']", "[role='radio']", "[role='switch']", 
-                "[contenteditable='true']" 
-            ]
-            all_elements_locators: List[Locator] = []
-            for css_selector in element_css_selectors:
-                try:
-                    elements = base_locator.locator(css_selector).all()
-                    all_elements_locators.extend(elements)
-                except PlaywrightError as e:
-                    logger.debug(f"Error locating elements with '{css_selector}' in '{form_selector_str}': {e}")
-                except Exception: pass
-
-            logger.info(f"Found {len(all_elements_locators)} potential form elements within '{form_selector_str}'.")
+            elements_loc = base_locator.locator(_FORM_ELEMENT_SELECTOR)
+            # One evaluate for the whole scope: visibility filter, attributes and labels come back together,
+            # and Locators are only materialised (via nth) for elements that become fields or buttons.
+            descriptors = elements_loc.evaluate_all(_SCRAPE_FORM_ELEMENTS_JS, _DESCRIPTOR_ATTRS)
+            scraped_at = time.monotonic()
+            logger.info(f"Found {len(descriptors)} visible form elements within '{form_selector_str}'.")
             field_candidates: List[FormField] = []
             
-            for element_loc in all_elements_locators:
+            for descriptor in descriptors:
                 try:
-                    if not element_loc.is_attached() or not element_loc.is_visible(timeout=100): 
-                        continue
-                    element_data = self._get_element_data(element_loc) 
-                    if not element_data: continue
+                    element_data = self._element_data_from_descriptor(descriptor)
                     
                     html_tag = element_data.get('tag', 'unknown')
                     html_type = element_data.get('type', '')
@@ -671,42 +967,37 @@ class FieldDetector:
                         button_classification = self._classify_button(element_data)
                         if button_classification and button_classification in analysis.action_buttons:
                             field = FormField(
-                                element=element_loc, 
+                                element=elements_loc.nth(descriptor['index']), 
                                 field_type=FieldType.SUBMIT_BUTTON if button_classification == 'submit' else \
                                            (FieldType.NEXT_BUTTON if button_classification == 'next' else FieldType.UNKNOWN), 
                                 confidence=0.85, 
-                                selector=element_data.get('selector', 'unknown_button_selector'),
+                                selector=self._selector_for(element_data),
                                 label_text=element_data.get('text') or element_data.get('aria-label'), 
                                 attributes=element_data
                             )
                             analysis.action_buttons[button_classification].append(field)
                             continue 
                             
-                    possible_types_for_element: List[Tuple[float, FieldType]] = []
-                    for ft_enum, patterns_for_type in self.field_patterns.items():
-                        confidence = self._calculate_confidence(element_data, patterns_for_type, ft_enum)
-                        if confidence > 0.15: 
-                            possible_types_for_element.append((confidence, ft_enum))
+                    possible_types_for_element: List[Tuple[float, FieldType]] = [
+                        (confidence, ft_enum) for ft_enum, confidence in self._score_element_all_types(element_data).items() if confidence > 0.15
+                    ]
                     
                     if possible_types_for_element:
                         possible_types_for_element.sort(key=lambda x: x[0], reverse=True)
                         best_confidence, best_field_type = possible_types_for_element[0]
                         if best_confidence >= self.config.get('confidence_threshold', 0.45):
                              field = FormField(
-                                element=element_loc, 
+                                element=elements_loc.nth(descriptor['index']), 
                                 field_type=best_field_type,
                                 confidence=best_confidence,
-                                selector=element_data.get('selector', 'unknown_field_selector'),
+                                selector='', # filled in for conflict-resolution winners only
                                 label_text=element_data.get('label'),
                                 attributes=element_data,
                                 context_text=element_data.get('context'),
-                                element_type_html=element_data.get('tag', 'unknown')
+                                element_type_html=element_data.get('tag', 'unknown'),
+                                last_interactable_at=0.0 if descriptor.get('disabled') else scraped_at
                             )
                              field_candidates.append(field)
-                except PlaywrightTimeoutError: 
-                    logger.debug(f"Element {generate_robust_selector(element_loc)} no longer visible during detection loop.")
-                except PlaywrightError as pe: 
-                    logger.debug(f"PlaywrightError processing element {generate_robust_selector(element_loc)}: {pe}")
                 except Exception as e_analyze:
                     logger.debug(f"Error analyzing specific element: {e_analyze}", exc_info=False)
             
@@ -731,164 +1022,135 @@ class FieldDetector:
 
     def _get_element_data(self, element_loc: Locator) -> Optional[Dict[str, Any]]:
         try:
-            tag_name = safe_get_tag_name(element_loc)
-            attrs = {
-                'tag': tag_name,
-                'type': safe_get_attribute(element_loc, 'type', default='text' if tag_name == 'input' else ''),
-                'name': safe_get_attribute(element_loc, 'name'),
-                'id': safe_get_attribute(element_loc, 'id'),
-                'class': safe_get_attribute(element_loc, 'class'),
-                'placeholder': safe_get_attribute(element_loc, 'placeholder'),
-                'aria-label': safe_get_attribute(element_loc, 'aria-label'),
-                'aria-labelledby': safe_get_attribute(element_loc, 'aria-labelledby'),
-                'aria-describedby': safe_get_attribute(element_loc, 'aria-describedby'),
-                'role': safe_get_attribute(element_loc, 'role'),
-                'autocomplete': safe_get_attribute(element_loc, 'autocomplete'),
-                'required': element_loc.evaluate_handle("el => el.required").json_value() if tag_name in ['input', 'select', 'textarea'] else False,
-                'value': safe_get_attribute(element_loc, 'value'), 
-                'text': safe_get_text_content(element_loc).strip(), 
-                'data-automation-id': safe_get_attribute(element_loc, 'data-automation-id'),
-                'selector': generate_robust_selector(element_loc, tag_hint=tag_name)
-            }
-            attrs['label'] = self.filler._get_field_label(element_loc, attrs.get('id'), attrs.get('aria-labelledby'))
-            return attrs
+            descriptor = fetch_element_descriptor(element_loc)
+            if not descriptor: return None
+            context = self.filler._collect_field_context(element_loc)
+            descriptor['label'] = context.pop('label', '')
+            descriptor['context'] = context
+            return self._element_data_from_descriptor(descriptor)
         except PlaywrightError as e: 
-            logger.debug(f"PlaywrightError getting element data for {generate_robust_selector(element_loc)}: {e}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"PlaywrightError getting element data for {generate_robust_selector(element_loc)}: {e}")
             return None
         except Exception as e_gen:
             logger.debug(f"Generic error getting element data: {e_gen}", exc_info=False)
             return None
 
-    def _calculate_confidence(self, element_data: Dict[str, Any], patterns_for_type: Dict[str, List[str]], field_type: FieldType) -> float:
-        score = 0.0
-        weights = self.attribute_weights 
-        text_attributes_to_check = ['label', 'name', 'id', 'placeholder', 'aria-label', 'text', 'data-automation-id', 'autocomplete']
+    @staticmethod
+    def _selector_for(element_data: Dict[str, Any]) -> str:
+        selector = element_data.get('selector')
+        if not selector:
+            selector = element_data['selector'] = generate_robust_selector(element_data['_descriptor'], tag_hint=element_data['tag'])
+        return selector
+
+    def _element_data_from_descriptor(self, descriptor: Dict[str, Any]) -> Dict[str, Any]:
+        tag_name = descriptor.get('tag') or 'unknown'
+        d_attrs = descriptor.get('attrs') or {}
+        element_data = {k: d_attrs.get(k) or '' for k in _ELEMENT_DATA_ATTRS}
+        element_data.update(
+            tag=tag_name, type=descriptor.get('type') or '', required=bool(descriptor.get('required')),
+            text=(descriptor.get('text') or '').strip(), label=descriptor.get('label') or '', _descriptor=descriptor,
+            context=" ".join(filter(None, (descriptor.get('context') or {}).values())),
+        )
+        # Lowered once here and shared by scoring and button classification.
+        element_data['_lower'] = {k: str(element_data[k]).lower() if element_data[k] else '' for k in _LOWERED_ATTRS}
+        return element_data
+
+    def _score_element_all_types(self, element_data: Dict[str, Any]) -> Dict[FieldType, float]:
+        # Every field type's fused patterns scan the same pre-lowered strings.
+        lowered = element_data['_lower']
+        html_type = lowered['type']
+        type_weight = self.attribute_weights.get('type', 3.0)
+        # \x01 never appears in attribute text, so negative matches cannot span two attributes.
+        neg_corpus = "\x01".join(lowered[attr] for attr in _NEGATIVE_CHECK_ATTRS)
+        candidate_types = _CANDIDATE_TYPES_BY_HTML.get((element_data.get('tag', ''), html_type))
+        scores: Dict[FieldType, float] = {}
         
-        for pattern_group_key, regex_list in patterns_for_type.items(): 
-            element_attr_to_match_val = None
-            if pattern_group_key == 'names': element_attr_to_match_val = element_data.get('name')
-            elif pattern_group_key == 'labels': element_attr_to_match_val = element_data.get('label')
-            elif pattern_group_key == 'placeholders': element_attr_to_match_val = element_data.get('placeholder')
-            elif pattern_group_key == 'types': element_attr_to_match_val = element_data.get('type')
-            elif pattern_group_key == 'autocompletes': element_attr_to_match_val = element_data.get('autocomplete')
-            elif pattern_group_key == 'data-automation-ids': element_attr_to_match_val = element_data.get('data-automation-id')
-            elif pattern_group_key == 'texts': element_attr_to_match_val = element_data.get('text')
+        for field_type, groups in self._scoring_groups.items():
+            if candidate_types is not None and field_type not in candidate_types: continue
+            score = 0.0
+            for attr, weight, group_pattern in groups:
+                attr_value_lower = lowered[attr]
+                if attr_value_lower and group_pattern.search(attr_value_lower):
+                    score += weight
+            
+            if html_type == field_type.value and field_type in [FieldType.EMAIL, FieldType.PASSWORD]: 
+                score += type_weight * 1.5 
+            elif html_type == 'tel' and field_type == FieldType.PHONE:
+                score += type_weight
+            elif html_type == 'file' and field_type in [FieldType.RESUME_FILE, FieldType.COVER_LETTER_FILE]:
+                score += type_weight
             
-            if not element_attr_to_match_val: continue
+            negative_pattern = self._compiled_negative_patterns.get(field_type)
+            if negative_pattern and score > 0:
+                neg_match = negative_pattern.search(neg_corpus)
+                if neg_match:
+                    logger.debug(f"Negative pattern '{neg_match.group(0)}' matched for {field_type.value}. Reducing score.")
+                    score *= 0.3 
 
-            attr_value_lower = str(element_attr_to_match_val).lower()
-            weight_for_this_attr_patterns = weights.get(pattern_group_key[:-1] if pattern_group_key.endswith('s') else pattern_group_key, 1.0)
-
-            for pattern_regex in regex_list:
-                try:
-                    if re.search(pattern_regex, attr_value_lower, re.IGNORECASE):
-                        score += weight_for_this_attr_patterns
-                        break 
-                except re.error:
-                    logger.warning(f"Invalid regex '{pattern_regex}' for {field_type.value}/{pattern_group_key}")
-        
-        html_type = element_data.get('type', '').lower()
-        if html_type == field_type.value and field_type in [FieldType.EMAIL, FieldType.PASSWORD]: 
-            score += weights.get('type', 3.0) * 1.5 
-        elif html_type == 'tel' and field_type == FieldType.PHONE:
-            score += weights.get('type', 3.0)
-        elif html_type == 'file' and field_type in [FieldType.RESUME_FILE, FieldType.COVER_LETTER_FILE]:
-            score += weights.get('type', 3.0)
-        
-        negative_regex_list = self.negative_patterns.get(field_type, [])
-        if negative_regex_list:
-            penalty_applied = False
-            for neg_regex in negative_regex_list:
-                for attr_to_check_neg in text_attributes_to_check: 
-                    val = str(element_data.get(attr_to_check_neg, '')).lower()
-                    if val:
-                        try:
-                            if re.search(neg_regex, val, re.IGNORECASE):
-                                logger.debug(f"Negative pattern '{neg_regex}' matched for {field_type.value} on attr '{attr_to_check_neg}': '{val}'. Reducing score.")
-                                score *= 0.3 
-                                penalty_applied = True; break 
-                        except re.error:
-                             logger.warning(f"Invalid negative regex '{neg_regex}' for {field_type.value}")
-                if penalty_applied: break
-
-        max_possible_score = sum(w for key, w in weights.items() if key in patterns_for_type or key == 'type') + 2.0 
-        if max_possible_score == 0: max_possible_score = 10.0 
-        normalized_score = min(score / max_possible_score, 1.0) if score > 0 else 0.0
-        return round(normalized_score, 3)
+            scores[field_type] = round(min(score / self._max_score_by_ft[field_type], 1.0), 3) if score > 0 else 0.0
+        return scores
 
     def _resolve_field_conflicts(self, candidates: List[FormField]) -> Dict[FieldType, FormField]:
-        resolved: Dict[FieldType, FormField] = {}
-        elements_candidates: Dict[str, List[FormField]] = {} 
+        # Only the top candidate per element, then per type, matters: keep running maxima instead of sorting.
+        # Elements are keyed by Locator identity (one per scraped element), so selectors are never built for losers.
+        best_per_element: Dict[int, FormField] = {}
         for ff_candidate in candidates:
-            element_key = ff_candidate.selector 
-            if element_key not in elements_candidates: elements_candidates[element_key] = []
-            elements_candidates[element_key].append(ff_candidate)
-
-        best_candidates_per_element: List[FormField] = []
-        for element_key, ff_list in elements_candidates.items():
-            if not ff_list: continue
-            ff_list.sort(key=lambda ff: ff.confidence, reverse=True)
-            best_candidates_per_element.append(ff_list[0]) 
+            element_key = id(ff_candidate.element) 
+            current = best_per_element.get(element_key)
+            if current is None or ff_candidate.confidence > current.confidence:
+                best_per_element[element_key] = ff_candidate
+
+        threshold = self.config.get('confidence_threshold', 0.45)
+        resolved: Dict[FieldType, FormField] = {}
+        for ff_candidate in best_per_element.values():
+            if ff_candidate.confidence < threshold:
+                logger.debug(f"Field type {ff_candidate.field_type.value} candidate (label='{ff_candidate.label_text}') confidence {ff_candidate.confidence:.2f} < threshold {threshold}. Ignoring.")
+                continue
+            current = resolved.get(ff_candidate.field_type)
+            if current is None or ff_candidate.confidence > current.confidence:
+                resolved[ff_candidate.field_type] = ff_candidate
         
-        final_by_type: Dict[FieldType, List[FormField]] = {}
-        for ff_candidate in best_candidates_per_element:
-            if ff_candidate.field_type not in final_by_type: final_by_type[ff_candidate.field_type] = []
-            final_by_type[ff_candidate.field_type].append(ff_candidate)
-            
-        for ft, ff_options in final_by_type.items():
-            if not ff_options: continue
-            ff_options.sort(key=lambda ff: ff.confidence, reverse=True) 
-            threshold = self.config.get('confidence_threshold', 0.45)
-            best_ff_for_type = ff_options[0]
-
-            if best_ff_for_type.confidence >= threshold:
-                if ft not in resolved or best_ff_for_type.confidence > resolved[ft].confidence:
-                    resolved[ft] = best_ff_for_type
-                    logger.debug(f"Resolved field: Type={ft.value}, Confidence={best_ff_for_type.confidence:.2f}, Selector='{best_ff_for_type.selector}'")
-            else:
-                logger.debug(f"Field type {ft.value} best candidate (selector='{best_ff_for_type.selector}') confidence {best_ff_for_type.confidence:.2f} < threshold {threshold}. Ignoring.")
+        for ft, ff in resolved.items():
+            ff.selector = self._selector_for(ff.attributes)
+            logger.debug(f"Resolved field: Type={ft.value}, Confidence={ff.confidence:.2f}, Selector='{ff.selector}'")
         return resolved
         
     def _classify_button(self, element_data: Dict[str, Any]) -> Optional[str]:
+        lowered = element_data['_lower']
         text_sources = [
-            element_data.get('text', ''), element_data.get('value', ''), 
-            element_data.get('aria-label', ''), element_data.get('name', ''), 
-            element_data.get('id', ''), element_data.get('data-automation-id', '')
+            lowered['text'], lowered['value'], lowered['aria-label'], 
+            lowered['name'], lowered['id'], lowered['data-automation-id']
         ]
-        full_text_corpus = " ".join(filter(None, text_sources)).lower()
+        full_text_corpus = " ".join(filter(None, text_sources))
         if not full_text_corpus.strip(): return None 
 
-        apply_patterns = [r'\bapply now\b', r'\bapply for this job\b', r'\bsubmit application\b', r'\bapply\b']
-        for pattern in apply_patterns:
-            if re.search(pattern, full_text_corpus): return 'apply'
-                
-        next_patterns = [r'\bnext\b', r'\bcontinue\b', r'\bproceed\b', r'\bstep \d+\b', r'\bforward\b']
-        for pattern in next_patterns:
-            if re.search(pattern, full_text_corpus):
-                if r'\bsave\b' in full_text_corpus and r'\bcontinue\b' in full_text_corpus: return 'submit' 
-                return 'next'
-
-        submit_patterns = [r'\bsubmit\b', r'\bsend\b', r'\bfinish\b', r'\bcomplete\b', r'\bdone\b', r'\bsave & exit\b', r'\bsave and exit\b', r'\bsave\b']
-        for pattern in submit_patterns:
-            if re.search(pattern, full_text_corpus): return 'submit'
+        if _APPLY_TEXT_RE.search(full_text_corpus): return 'apply'
+        if _NEXT_TEXT_RE.search(full_text_corpus):
+            return 'submit' if _SAVE_CONTINUE_TEXT_RE.match(full_text_corpus) else 'next'
+        if _SUBMIT_TEXT_RE.search(full_text_corpus): return 'submit'
         
-        if element_data.get('type', '').lower() == 'submit': return 'submit'
+        if lowered['type'] == 'submit': return 'submit'
         return None 
 
+    @staticmethod
+    def _has_at_least(present, wanted: frozenset, n: int) -> bool:
+        count = 0
+        for ft in wanted:
+            if ft in present:
+                count += 1
+                if count >= n: return True
+        return False
+
     def _detect_form_purpose(self, detected_fields: Dict[FieldType, FormField]) -> str:
-        field_types_present = set(detected_fields.keys())
-        job_app_keywords = {
-            FieldType.RESUME_FILE, FieldType.COVER_LETTER_FILE, FieldType.LINKEDIN,
-            FieldType.COMPANY, FieldType.JOB_TITLE, FieldType.YEARS_EXPERIENCE,
-            FieldType.SCHOOL, FieldType.DEGREE
-        }
+        field_types_present = detected_fields.keys()
         if FieldType.RESUME_FILE in field_types_present or \
            (FieldType.JOB_TITLE in field_types_present and FieldType.COMPANY in field_types_present) or \
-           len(field_types_present.intersection(job_app_keywords)) >= 2: 
+           self._has_at_least(field_types_present, _JOB_APP_FIELD_TYPES, 2): 
             return "job_application"
             
         if FieldType.EMAIL in field_types_present and FieldType.PASSWORD in field_types_present:
-            other_fields = field_types_present - {FieldType.EMAIL, FieldType.PASSWORD, FieldType.SUBMIT_BUTTON, FieldType.NEXT_BUTTON}
+            other_fields = field_types_present - _LOGIN_FORM_FIELD_TYPES
             if not other_fields or len(other_fields) <= 1: 
                 return "login"
 
@@ -901,8 +1163,8 @@ class FieldDetector:
             (FieldType.TEXTAREA in field_types_present or FieldType.TEXT_INPUT in field_types_present)): 
             for ft, ff in detected_fields.items():
                 if ft in [FieldType.TEXTAREA, FieldType.TEXT_INPUT]:
-                    text_content = (ff.label_text or "") + " " + (ff.attributes.get('placeholder', ''))
-                    if any(kw in text_content.lower() for kw in ["message", "comment", "query", "question", "feedback"]):
+                    text_content = ((ff.label_text or "") + " " + (ff.attributes.get('placeholder', ''))).lower()
+                    if any(kw in text_content for kw in _CONTACT_KEYWORDS):
                         return "contact"
             if len(field_types_present) <= 5 : return "contact" 
         return "general_form"
@@ -910,58 +1172,33 @@ class FieldDetector:
     def _detect_multi_step_indicators(self, page_or_frame: Union[Page, Frame]) -> Dict[str, Any]:
         results = {'is_multi_step': False, 'current_step': 1, 'total_steps': 1}
         try:
-            step_indicator_selectors = [
-                "[class*='step']:visible", "[class*='progress']:visible", "[class*='wizard']:visible", 
-                "[role='tablist']:has([role='tab'][aria-selected='true'])", 
-                ".breadcrumb li.active", ".pagination .active", 
-                "[data-step]:visible", "[aria-current='step']", 
-                "[data-automation-id*='progressBar'] li[data-automation-id*='selected']",
-                "[data-automation-id*='stepIndicator']"
-            ]
-            text_pattern_regex = re.compile(r'(?:step\s*)?(\d+)\s*(?:of|\/|from)\s*(\d+)', re.IGNORECASE)
-
-            for selector in step_indicator_selectors:
-                try:
-                    elements = page_or_frame.locator(selector).all()
-                    if not elements: continue
-                    results['is_multi_step'] = True
-                    
-                    for el in elements:
-                        if not el.is_visible(timeout=100): continue 
-                        el_text = (safe_get_text_content(el) + " " + safe_get_attribute(el, "aria-label","")).strip()
-                        match = text_pattern_regex.search(el_text)
-                        if match:
-                            current_s, total_s = int(match.group(1)), int(match.group(2))
-                            if total_s > 1: 
-                                results['current_step'] = current_s; results['total_steps'] = total_s
-                                logger.debug(f"Multi-step detected via text: Step {current_s} of {total_s} from '{el_text[:50]}...' (Selector: {selector})")
-                                return results 
-
-                        if "progress" in selector or "wizard" in selector or "tablist" in selector or "breadcrumb" in selector :
-                            total_items_loc = el.locator("li, [role='tab'], div[class*='step-item']") 
-                            total_items_count = total_items_loc.count()
-                            if total_items_count > 1:
-                                results['total_steps'] = total_items_count
-                                active_item_loc = el.locator("li.active, li[class*='current'], li[class*='active'], [role='tab'][aria-selected='true'], div[class*='current'], div[class*='active']")
-                                # if active_item_loc.count() == 1: pass # Current step might remain 1
-                                logger.debug(f"Multi-step inferred: {total_items_count} items in {selector}.")
-                                return results 
-                    if results['is_multi_step']: 
-                        logger.debug(f"Multi-step inferred from selector '{selector}' presence, but no specific step numbers extracted.")
+            probes = page_or_frame.evaluate(_STEP_INDICATOR_JS, [list(spec) for spec in _STEP_INDICATOR_SPECS])
+            for (selector, _), probe in zip(_STEP_INDICATOR_SPECS, probes):
+                if not probe['present']: continue
+                results['is_multi_step'] = True
+                
+                for item in probe['items']:
+                    el_text = item['text']
+                    match = _STEP_RE.search(el_text)
+                    if match:
+                        current_s, total_s = int(match.group(1)), int(match.group(2))
+                        if total_s > 1: 
+                            results['current_step'] = current_s; results['total_steps'] = total_s
+                            logger.debug(f"Multi-step detected via text: Step {current_s} of {total_s} from '{el_text[:50]}...' (Selector: {selector})")
+                            return results 
+
+                    if item['itemCount'] > 1 and any(k in selector for k in ("progress", "wizard", "tablist", "breadcrumb")):
+                        results['total_steps'] = item['itemCount']
+                        logger.debug(f"Multi-step inferred: {item['itemCount']} items in {selector}.")
                         return results 
-                except PlaywrightTimeoutError: pass 
-                except Exception: pass 
+                logger.debug(f"Multi-step inferred from selector '{selector}' presence, but no specific step numbers extracted.")
+                return results 
         except Exception as e: 
             logger.debug(f"Error detecting multi-step indicators: {e}")
         return results 
         
     def _is_element_visible(self, element: Locator) -> bool: 
-        try:
-            return element.is_visible() and element.is_enabled() 
-        except PlaywrightError: 
-            return False
-        except Exception:
-            return False
+        return is_interactable(element)
 
 # ========== OTHER HELPER CLASSES (ShadowDOMHandler, CustomComponentHandler, etc. kept as is from original) ==========
 class ShadowDOMHandler:
@@ -975,7 +1212,7 @@ class ShadowDOMHandler:
             logger.debug(f"Direct fill failed for shadow element: {e_fill}. Trying JS eval fill.")
             try:
                 element.evaluate("el => el.value = arguments[0]", arg=value)
-                element.dispatch_event('input'); element.dispatch_event('change'); element.dispatch_event('blur')
+                element.evaluate(_FIELD_EVENTS_JS)
                 return True
             except Exception as e_eval:
                 logger.warning(f"JS eval fill also failed for shadow element: {e_eval}. Trying coordinate click and type.")
@@ -1030,6 +1267,14 @@ class CustomComponentHandler:
             except Exception as js_e: logger.error(f"JS value setting also failed for custom component: {js_e}")
         return False
 
+_GENERIC_NEXT_SELECTOR = ", ".join((
+    "button:has-text('Next')", "button:has-text('Continue')", "button:has-text('Proceed')",
+    "input[type='button'][value*='Next' i]", "input[type='button'][value*='Continue' i]",
+    "a:has-text('Next')", "a:has-text('Continue')",
+    "[data-automation-id*='next']", "[data-automation-id*='continue']",
+    "[role='button']:has-text('Next')", "[role='button']:has-text('Continue')",
+))
+
 class MultiStepFormHandler: 
     def __init__(self, page: Page, field_detector: FieldDetector, anti_detection: AntiDetectionManager):
         self.page = page; self.field_detector = field_detector; self.anti_detection = anti_detection
@@ -1038,31 +1283,22 @@ class MultiStepFormHandler:
     def navigate_next(self, action_buttons_analysis: List[FormField]) -> bool: # Takes FormField list
         if not action_buttons_analysis:
             logger.info("No pre-analyzed 'next' buttons provided to navigate_next. Trying generic selectors.")
-            generic_next_selectors = [
-                "button:has-text('Next' i)", "button:has-text('Continue' i)", "button:has-text('Proceed' i)",
-                "input[type='button'][value*='Next' i]", "input[type='button'][value*='Continue' i]",
-                "a:has-text('Next' i)", "a:has-text('Continue' i)",
-                "[data-automation-id*='next']", "[data-automation-id*='continue']",
-                "[role='button']:has-text('Next' i)", "[role='button']:has-text('Continue' i)",
-            ]
-            for selector in generic_next_selectors:
+            if find_first_interactable(self.page, [_GENERIC_NEXT_SELECTOR]):
                 try:
-                    elements = self.page.locator(selector).all()
-                    for button in elements:
-                        if button.is_visible(timeout=500) and button.is_enabled(timeout=500):
-                            logger.info(f"Navigating next with generic selector: {selector}")
-                            button.scroll_into_view_if_needed(timeout=1000)
-                            button.click(delay=random.randint(50,100), timeout=DEFAULT_ACTION_TIMEOUT // 2)
-                            self.anti_detection.random_delay(800, 1500) 
-                            return True
-                except Exception: continue
+                    button = self.page.locator(PICKED_ELEMENT_SELECTOR).first
+                    logger.info("Navigating next with generic Next/Continue selector.")
+                    button.scroll_into_view_if_needed(timeout=1000)
+                    button.click(delay=random.randint(50,100), timeout=DEFAULT_ACTION_TIMEOUT // 2)
+                    self.anti_detection.random_delay(800, 1500) 
+                    return True
+                except Exception as e: logger.debug(f"Error clicking generic Next button: {e}")
             logger.warning("Generic 'Next' button not found or failed to click.")
             return False
 
         for ff_button in action_buttons_analysis: 
             try:
                 button_loc = ff_button.element
-                if button_loc.is_visible(timeout=500) and button_loc.is_enabled(timeout=500):
+                if is_interactable(button_loc):
                     logger.info(f"Clicking 'Next' button: {ff_button.selector} (Label: {ff_button.label_text})")
                     button_loc.scroll_into_view_if_needed(timeout=1000)
                     button_loc.click(delay=random.randint(50,100), timeout=DEFAULT_ACTION_TIMEOUT // 2)
@@ -1073,12 +1309,19 @@ class MultiStepFormHandler:
         logger.warning("No suitable 'Next' button found or clicked from analyzed list.")
         return False
 
+@lru_cache(maxsize=64)
+def _path_is_file(path_str: str) -> bool:
+    # One stat per distinct path per application run; cleared at the start of each run.
+    try:
+        return os.path.isfile(path_str)
+    except OSError:
+        return False
+
 class FileUploadHandler: 
     def __init__(self, page: Page): self.page = page
     def handle_file_upload(self, field_match: FormField, file_path_str: str) -> bool:
         try:
-            file_path = Path(file_path_str)
-            if not file_path.exists() or not file_path.is_file():
+            if not _path_is_file(file_path_str):
                 logger.error(f"File not found or is not a file: {file_path_str}")
                 return False
             element_loc = field_match.element
@@ -1089,6 +1332,7 @@ class FileUploadHandler:
                     logger.info("Attempted to make file input visible via JS.")
                     self.page.wait_for_timeout(100) 
                 except Exception as js_e: logger.warning(f"Failed to make file input visible via JS: {js_e}")
+            file_path = Path(file_path_str)
             element_loc.set_input_files(file_path, timeout=DEFAULT_ACTION_TIMEOUT) 
             logger.info(f"Successfully set input_files for '{field_match.field_type.value}' with: {file_path.name}")
             self.page.wait_for_timeout(INTERACTION_DELAY_MS * 2) 
@@ -1109,11 +1353,59 @@ class PatternLearningSystem:
         logger.debug(f"PatternLearningSystem.record_attempt called (placeholder). URL: {form_analysis.url}")
         pass
 
+# The learner holds no page state, so one is shared by every filler in the process instead of being rebuilt per application.
+@lru_cache(maxsize=1)
+def _shared_pattern_learner() -> PatternLearningSystem:
+    return PatternLearningSystem()
+
+# The decision handler caches page content and probe results by URL, so each worker thread gets its own
+# (built once per thread rather than re-read from disk per application).
+_decision_handler_local = threading.local()
+
+def _shared_decision_handler() -> DecisionHandler:
+    handler = getattr(_decision_handler_local, "handler", None)
+    if handler is None:
+        handler = _decision_handler_local.handler = DecisionHandler()
+    return handler
+
+# First selector in priority order that matches anything; invalid selectors are skipped rather than aborting the probe.
+_FIRST_MATCHING_SELECTOR_JS = "(sels) => sels.find(s => { try { return document.querySelector(s) !== null; } catch (e) { return false; } }) || null"
+
+# Read, click if needed and re-read checkbox state in one round-trip.
+_TOGGLE_CHECKBOX_JS = "(el, want) => { if (el.checked !== want) el.click(); return el.checked === want; }"
+
+_INTERACTABLE_FRESH_S = 2.0
+
+_SELECT_OPTIONS_JS = "sel => Array.from(sel.options, o => [o.getAttribute('value'), o.textContent])"
+
+_SUBMIT_FALLBACK_SELECTOR = ", ".join((
+    "button[type='submit']", "input[type='submit']",
+    "button:has-text('Submit')", "button:has-text('Apply')",
+    "button:has-text('Finish')", "button:has-text('Complete')",
+    "[data-automation-id*='submit']", "[data-automation-id*='finish']",
+    "[role='button']:has-text('Submit')",
+))
+
+# URL/page-text classification for fill_entire_application's entry stages ("search/job" is covered by "job").
+_JOB_LISTING_URL_RE = re.compile(r"job|career", re.I)
+_APPLICATION_URL_RE = re.compile(r"apply|application|candidate|form|talent|login|signin", re.I)
+_SESSION_COOKIE_NAMES = frozenset({"jsessionid", "sid", "sessionid", "session", "workday_session", "connect.sid", "phpsessid", "asp.net_sessionid"})
+_DECISION_PAGE_SELECTOR = ", ".join(DECISION_PAGE_SELECTORS)
+_DECISION_TEXT_RE = re.compile(r"start your application|please select how you would like to apply", re.I)
+_DECISION_TEXT_GONE_JS = "(pattern) => !new RegExp(pattern, 'i').test(document.body ? document.body.innerText : '')"
+
 # ========== UNIVERSAL FORM FILLER ==========
 class UniversalFormFiller:
-    def __init__(self, page: Page, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, page: Page, config: Optional[Dict[str, Any]] = None, restored_session: bool = False,
+                 interactive: bool = True):
         self.page = page
         self.config = config or self._default_config()
+        # Set when the context was created from a saved storage_state; only then can a session cookie mean "signed in".
+        self.restored_session = restored_session
+        # Batch workers have no usable terminal (process workers read /dev/null), so they must never block on input().
+        self.interactive = interactive
+        # Nobody can solve a CAPTCHA for a batch worker, so it does not pause for one.
+        self._captcha_wait_s = 7 if interactive else 0
         logger.info(f"UniversalFormFiller initialized. Config loaded.")
         self.field_patterns = self._get_default_field_patterns()
         self.negative_patterns = self._get_default_negative_patterns()
@@ -1125,38 +1417,30 @@ class UniversalFormFiller:
         self.custom_component_handler = CustomComponentHandler(page) 
         self.multi_step_handler = MultiStepFormHandler(page, self.field_detector, self.anti_detection)
         self.file_handler = FileUploadHandler(page) 
-        self.pattern_learner = PatternLearningSystem()
+        self.pattern_learner = _shared_pattern_learner()
         self.form_context = FormContextData() 
         self.current_form_analysis: Optional[FormAnalysisResult] = None 
         self.filled_fields_session: set[Tuple[str, FieldType]] = set() 
+        self._form_selector_cache: Dict[str, str] = {}
+        self._form_selectors: Tuple[str, ...] = tuple(self.config.get("form_selectors_priority", ["form", "body"]))
+        self._screenshot_statuses: set[str] = set()
+        self._run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._delay_pool: List[int] = random.choices(range(30, 121), k=256)
+        self._delay_idx = 0
+        # Native control handlers keyed by (tag, input type); built once so _fill_single_field does one lookup.
+        self._fill_dispatch: Dict[Tuple[str, str], Callable[[Locator, Any], bool]] = {
+            ('input', 'checkbox'): lambda el, v: self._fill_checkbox(el, bool(v)),
+            ('input', 'radio'): lambda el, v: self._fill_radio_button(el) if v else True,
+            ('select', ''): lambda el, v: self._fill_select_dropdown(el, str(v)),
+        }
 
     @staticmethod
     def _get_default_field_patterns() -> Dict[FieldType, Dict[str, List[str]]]:
-        return {
-            FieldType.EMAIL: {'names': [r'email', r'e-?mail', r'user-?name', r'login', r'userPrincipalName'],'labels': [r'email\s*address', r'e-?mail', r'your\s*email', r'user\s*name', r'login\s*id'],'placeholders': [r'enter\s*email', r'email', r'@', r'example@company\.com'],'types': [r'^email$'],'autocompletes': [r'email', r'username'],'data-automation-ids': [r'email', r'username', r'userid']},
-            FieldType.PASSWORD: {'names': [r'password', r'pass-?word', r'pwd', r'userPass', r'credentials\.password'],'labels': [r'password', r'pass-?word', r'pincode'],'placeholders': [r'enter\s*password', r'password'],'types': [r'^password$'],'autocompletes': [r'current-password', r'new-password'],'data-automation-ids': [r'password']},
-            FieldType.FIRST_NAME: {'names': [r'first-?name', r'f-?name', r'given-?name', r'forename', r'firstName', r'contact\.firstName'],'labels': [r'first\s*name', r'given\s*name', r'forename'],'placeholders': [r'first\s*name', r'given\s*name'],'autocompletes': [r'given-name', r'fname']},
-            FieldType.LAST_NAME: {'names': [r'last-?name', r'l-?name', r'surname', r'family-?name', r'lastName', r'contact\.lastName'],'labels': [r'last\s*name', r'surname', r'family\s*name'],'placeholders': [r'last\s*name', r'surname'],'autocompletes': [r'family-name', r'lname']},
-            FieldType.PHONE: {'names': [r'phone', r'mobile', r'cell', r'telephone', r'contact-?number', r'primaryPhone'],'labels': [r'phone', r'mobile', r'telephone', r'contact\s*number', r'phone\s*number'],'placeholders': [r'phone', r'mobile', r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}', r'phone\s*number'],'types': [r'^tel$'],'autocompletes': [r'tel', r'tel-national']},
-            FieldType.COMPANY: {'names': [r'company', r'employer', r'organization', r'current-?employer', r'businessName'],'labels': [r'company', r'employer', r'organization', r'current\s*employer', r'company\s*name'],'placeholders': [r'company', r'employer', r'organization\s*name'],'autocompletes': [r'organization']},
-            FieldType.JOB_TITLE: {'names': [r'job-?title', r'position', r'role', r'title', r'currentPosition'],'labels': [r'job\s*title', r'position', r'current\s*position', r'role', r'desired\s*position'],'placeholders': [r'job\s*title', r'position', r'your\s*role'],'autocompletes': [r'organization-title']},
-            FieldType.RESUME_FILE: {'names': [r'resume', r'cv', r'curriculum', r'resume-?upload', r'cv-?upload', r'attachment'],'labels': [r'resume', r'cv', r'upload\s*resume', r'attach\s*resume', r'curriculum\s*vitae'],'types': [r'^file$'],'data-automation-ids': [r'resumeupload', r'fileuploader', r'attachCV']},
-            FieldType.ADDRESS_LINE1: {'names': [r'address(1|Line1)?', r'street', r'addr1'],'labels': [r'address\s*(line\s*1)?', r'street\s*address'],'placeholders': [r'street\s*address', r'address\s*line\s*1'],'autocompletes': [r'address-line1', r'street-address']},
-            FieldType.CITY: {'names': [r'city', r'town'],'labels': [r'city', r'town', r'suburb'],'placeholders': [r'city', r'town'],'autocompletes': [r'address-level2', r'city']},
-            FieldType.STATE: {'names': [r'state', r'province', r'region'],'labels': [r'state', r'province', r'region'],'placeholders': [r'state', r'province'],'autocompletes': [r'address-level1', r'state']},
-            FieldType.ZIP_CODE: {'names': [r'zip(-?code)?', r'postal(-?code)?', r'postcode'],'labels': [r'zip', r'postal\s*code', r'post\s*code'],'placeholders': [r'zip', r'postal\s*code', r'\d{5}(-\d{4})?'],'autocompletes': [r'postal-code', r'zip']},
-            FieldType.TEXTAREA: {'names': [r'cover-?letter', r'message', r'comment', r'additional-?info', r'summary', r'description'],'labels': [r'cover\s*letter', r'message', r'comments', r'additional\s*information', r'tell\s*us\s*more']},
-        }
+        return _DEFAULT_FIELD_PATTERNS
 
     @staticmethod
     def _get_default_negative_patterns() -> Dict[FieldType, List[str]]:
-        return {
-            FieldType.EMAIL: [r'confirm', r're-?type', r'verify', r'new\s*email', r'search', r'filter'], 
-            FieldType.PASSWORD: [r'confirm', r're-?type', r'verify', r'new\s*password', r'current\s*password', r'old\s*password'], 
-            FieldType.FIRST_NAME: [r'last', r'family', r'surname', r'middle', r'initial'],
-            FieldType.LAST_NAME: [r'first', r'given', r'middle', r'initial'],
-            FieldType.PHONE: [r'extension', r'ext\.?', r'country\s*code', r'area\s*code'], 
-        }
+        return _DEFAULT_NEGATIVE_PATTERNS
 
     @staticmethod
     def _get_default_attribute_weights() -> Dict[str, float]:
@@ -1173,63 +1457,51 @@ class UniversalFormFiller:
         }
 
     def _get_current_form_selector(self, current_page_or_frame: Union[Page, Frame]) -> str:
-        for selector in self.config.get("form_selectors_priority", ["form", "body"]):
-            try:
-                if current_page_or_frame.locator(selector).count() > 0:
-                    logger.info(f"UFF: Using form context selector: '{selector}' for URL: {current_page_or_frame.url[:70]}")
-                    return selector
-            except PlaywrightError as e: 
-                logger.debug(f"Selector '{selector}' not found or error during form selection: {e}")
-            except Exception: pass
+        url = current_page_or_frame.url
+        cached = self._form_selector_cache.get(url)
+        if cached: return cached
+        selector = None
+        try:
+            selector = current_page_or_frame.evaluate(_FIRST_MATCHING_SELECTOR_JS, self._form_selectors)
+        except PlaywrightError as e: 
+            logger.debug(f"Error probing form selectors: {e}")
+        except Exception: pass
+        if selector:
+            logger.info(f"UFF: Using form context selector: '{selector}' for URL: {url[:70]}")
+            # 'body' is not cached: the real form may simply not have rendered yet.
+            if selector != "body": self._form_selector_cache[url] = selector
+            return selector
         logger.warning("UFF: No primary form selector found from priority list, defaulting to 'body'. This might be slow or too broad.")
         return "body" 
 
+    def _next_delay(self) -> int:
+        # Click/pause jitter drawn from a pool filled once per filler; reshuffled after each full pass.
+        if self._delay_idx >= len(self._delay_pool):
+            random.shuffle(self._delay_pool)
+            self._delay_idx = 0
+        delay = self._delay_pool[self._delay_idx]
+        self._delay_idx += 1
+        return delay
+
     def _is_element_interactable(self, element: Locator, timeout_ms: int = 500) -> bool:
-        try:
-            if not element.is_attached(): return False 
-            return element.is_visible(timeout=timeout_ms) and element.is_enabled(timeout=timeout_ms)
-        except PlaywrightError: return False
-        except Exception: return False
+        return is_interactable(element, timeout_ms)
 
-    def _get_field_label(self, element_loc: Locator, element_id: Optional[str], aria_labelledby: Optional[str]) -> str:
-        if aria_labelledby:
-            try:
-                label_texts = []
-                for label_id in aria_labelledby.split():
-                    referenced_label_element = self.page.locator(f"#{re.escape(label_id)}").first
-                    if referenced_label_element.is_attached() and referenced_label_element.is_visible(timeout=100):
-                        label_texts.append(safe_get_text_content(referenced_label_element).strip())
-                if label_texts: return " ".join(label_texts)
-            except Exception as e: logger.debug(f"Error getting aria-labelledby content: {e}")
-
-        if element_id:
-            try:
-                safe_id_selector = re.sub(r'[^a-zA-Z0-9_-]', '', element_id) 
-                if safe_id_selector:
-                     label_element = self.page.locator(f"label[for='{safe_id_selector}']").first
-                     if label_element.is_attached() and label_element.is_visible(timeout=100):
-                         return safe_get_text_content(label_element).strip()
-            except Exception as e: logger.debug(f"Error getting <label for='{element_id}'>: {e}")
+    def _collect_field_context(self, element_loc: Locator, max_chars: int = 100) -> Dict[str, str]:
+        # Label, parent text and previous-sibling text in one round-trip.
         try:
-            parent_label = element_loc.locator("xpath=ancestor::label[1]").first
-            if parent_label.is_attached() and parent_label.is_visible(timeout=100):
-                return safe_get_text_content(parent_label).strip()
-        except Exception as e: logger.debug(f"Error getting parent label text: {e}")
-        return "" 
+            return element_loc.evaluate(_FIELD_CONTEXT_JS, max_chars, timeout=1000) or {}
+        except PlaywrightError as e:
+            logger.debug(f"Error collecting label/context: {e}")
+        except Exception as e:
+            logger.debug(f"Generic error collecting label/context: {e}")
+        return {}
+
+    def _get_field_label(self, element_loc: Locator) -> str:
+        return self._collect_field_context(element_loc).get('label', '')
 
     def _get_surrounding_context(self, element_loc: Locator, max_chars: int = 100) -> Dict[str, str]:
-        context = {}
-        try:
-            parent = element_loc.locator("xpath=parent::*").first
-            if parent.is_attached(timeout=100): 
-                parent_text = safe_get_text_content(parent)
-                context['parent_text'] = parent_text[:max_chars].strip()
-            prev_sibling = element_loc.locator("xpath=preceding-sibling::*[1]").first
-            if prev_sibling.is_attached(timeout=100):
-                context['prev_sibling_text'] = safe_get_text_content(prev_sibling)[:max_chars].strip()
-        except PlaywrightError: pass 
-        except Exception: pass
-        return context
+        context = self._collect_field_context(element_loc, max_chars)
+        return {k: context[k] for k in ('parent_text', 'prev_sibling_text') if context.get(k)}
 
     def _analyze_page_and_detect_fields(self, current_page_or_frame: Union[Page, Frame]) -> FormAnalysisResult:
         self.stability_manager.wait_for_intelligent_stability(
@@ -1258,17 +1530,17 @@ class UniversalFormFiller:
             fill_result.duration = time.time() - start_time
             return fill_result
 
-        fields_to_attempt_fill: List[Tuple[FormField, Any]] = []         
-        for field_type_enum, value_to_fill in form_data_for_current_step.items():
-            if not isinstance(field_type_enum, FieldType):
-                logger.warning(f"Skipping invalid FieldType in form_data: {field_type_enum}")
-                continue
-            detected_form_field = analysis_result.detected_fields.get(field_type_enum)
-            if detected_form_field:
-                fields_to_attempt_fill.append((detected_form_field, value_to_fill))
-            else:
-                logger.warning(f"Field type {field_type_enum.value} from input data not found among detected fields on page.")
-                fill_result.skipped_fields.append(f"{field_type_enum.value} (not detected)")
+        detected = analysis_result.detected_fields
+        fields_to_attempt_fill: List[Tuple[FormField, Any]] = [
+            (detected[k], v) for k, v in form_data_for_current_step.items() if k in detected]
+        unmatched = form_data_for_current_step.keys() - detected.keys()
+        if unmatched:
+            invalid = [k for k in unmatched if not isinstance(k, FieldType)]
+            if invalid: logger.warning(f"Skipping invalid FieldType keys in form_data: {invalid}")
+            missing = [k.value for k in unmatched if isinstance(k, FieldType)]
+            if missing:
+                logger.warning(f"Field types from input data not found among detected fields on page: {missing}")
+                fill_result.skipped_fields.extend(f"{name} (not detected)" for name in missing)
         
         fill_result.fields_attempted_count = len(fields_to_attempt_fill)
         if not fields_to_attempt_fill:
@@ -1315,10 +1587,13 @@ class UniversalFormFiller:
         element_loc = field_match.element
         field_type = field_match.field_type
         element_html_type = field_match.element_type_html 
-        input_type_attr = field_match.attributes.get('type', '').lower() 
+        attributes = field_match.attributes
+        input_type_attr = attributes.get('type', '').lower() 
 
         try:
-            if not self._is_element_interactable(element_loc, timeout_ms=1000): 
+            # Detection already saw the element visible and enabled; skip the re-probe if that was just now.
+            recently_checked = time.monotonic() - field_match.last_interactable_at < _INTERACTABLE_FRESH_S
+            if not recently_checked and not self._is_element_interactable(element_loc, timeout_ms=1000): 
                 logger.warning(f"Element for {field_type.value} (Selector: {field_match.selector}) is not interactable before fill.")
                 try: element_loc.scroll_into_view_if_needed(timeout=1000)
                 except: pass
@@ -1331,18 +1606,14 @@ class UniversalFormFiller:
                     return False
                 return self.file_handler.handle_file_upload(field_match, str(value))
 
-            if element_html_type == 'input' and input_type_attr == 'checkbox':
-                return self._fill_checkbox(element_loc, bool(value))
-            if element_html_type == 'input' and input_type_attr == 'radio':
-                if value: return self._fill_radio_button(element_loc) 
-                return True 
-            if element_html_type == 'select':
-                return self._fill_select_dropdown(element_loc, str(value))
-            if self.custom_component_handler.is_custom_component(element_loc, field_match.attributes): # Pass attributes
+            handler = self._fill_dispatch.get((element_html_type, '' if element_html_type == 'select' else input_type_attr))
+            if handler: return handler(element_loc, value)
+            if self.custom_component_handler.is_custom_component(element_loc, attributes): # Pass attributes
                 logger.info(f"Attempting to fill {field_type.value} as a custom component.")
                 return self.custom_component_handler.fill_custom_component(element_loc, str(value), component_type_hint=field_type.value)
-            if element_html_type in ['input', 'textarea'] or field_match.attributes.get('contenteditable') == 'true':
-                return self._fill_standard_text_field(element_loc, str(value), is_content_editable=(field_match.attributes.get('contenteditable') == 'true'))
+            is_content_editable = attributes.get('contenteditable') == 'true'
+            if element_html_type in ('input', 'textarea') or is_content_editable:
+                return self._fill_standard_text_field(element_loc, str(value), is_content_editable=is_content_editable)
             
             logger.warning(f"Unhandled element type for filling: HTML Tag='{element_html_type}', Input Type='{input_type_attr}', FieldType='{field_type.value}'")
             return False
@@ -1360,9 +1631,7 @@ class UniversalFormFiller:
                 self.anti_detection.human_type(element, value) 
             else:
                 element.fill(value, timeout=DEFAULT_ACTION_TIMEOUT // 2) 
-            for event_name in ["input", "change", "blur"]:
-                try: element.dispatch_event(event_name)
-                except PlaywrightError: pass 
+            dispatch_field_events(element)
             return True
         except PlaywrightError as pe:
             logger.warning(f"PlaywrightError in _fill_standard_text_field: {pe}. Trying fallback type if not contenteditable.")
@@ -1370,9 +1639,7 @@ class UniversalFormFiller:
                  try:
                      element.press("Control+A"); element.press("Delete")    
                      element.type(value, delay=30, timeout=DEFAULT_ACTION_TIMEOUT)
-                     for event_name in ["input", "change", "blur"]:
-                         try: element.dispatch_event(event_name)
-                         except PlaywrightError: pass
+                     dispatch_field_events(element)
                      return True
                  except Exception as type_e:
                      logger.error(f"Fallback type also failed for standard text field: {type_e}")
@@ -1383,16 +1650,15 @@ class UniversalFormFiller:
     def _fill_checkbox(self, element: Locator, should_be_checked: bool) -> bool:
         try:
             element.scroll_into_view_if_needed(timeout=500)
-            current_is_checked = element.is_checked(timeout=DEFAULT_ACTION_TIMEOUT // 3)
-            if current_is_checked != should_be_checked:
-                element.click(delay=random.randint(30,80), timeout=DEFAULT_ACTION_TIMEOUT // 2)
-                self.page.wait_for_timeout(INTERACTION_DELAY_MS // 2) 
-                if element.is_checked(timeout=1000) != should_be_checked:
-                    logger.warning(f"Checkbox state did not change as expected after click for {generate_robust_selector(element)}")
-                    element.set_checked(should_be_checked, timeout=DEFAULT_ACTION_TIMEOUT // 2)
-                    if element.is_checked(timeout=1000) != should_be_checked:
-                         logger.error(f"Failed to set checkbox state even with set_checked for {generate_robust_selector(element)}")
-                         return False
+            if self.config.get("enable_anti_detection", True):
+                self.page.wait_for_timeout(self._next_delay())
+            if element.evaluate(_TOGGLE_CHECKBOX_JS, should_be_checked, timeout=DEFAULT_ACTION_TIMEOUT // 2):
+                return True
+            logger.warning(f"Checkbox state did not change as expected after click for {generate_robust_selector(element)}")
+            element.set_checked(should_be_checked, timeout=DEFAULT_ACTION_TIMEOUT // 2)
+            if element.is_checked(timeout=1000) != should_be_checked:
+                logger.error(f"Failed to set checkbox state even with set_checked for {generate_robust_selector(element)}")
+                return False
             return True
         except Exception as e:
             logger.error(f"Error filling checkbox {generate_robust_selector(element)}: {e}", exc_info=True)
@@ -1424,11 +1690,10 @@ class UniversalFormFiller:
             except PlaywrightError:
                 logger.debug(f"Failed to select dropdown by exact label '{value_to_select}', trying by partial label.")
             try:
-                options = element.locator("option").all()
-                for opt_loc in options:
-                    opt_text = (safe_get_text_content(opt_loc) or "").strip()
-                    opt_val = safe_get_attribute(opt_loc, "value")
-                    if value_to_select.lower() in opt_text.lower():
+                wanted = value_to_select.lower()
+                for opt_val, opt_text in element.evaluate(_SELECT_OPTIONS_JS):
+                    opt_text = (opt_text or "").strip()
+                    if wanted in opt_text.lower():
                         target_to_select = {"label": opt_text} if not opt_val else {"value": opt_val}
                         element.select_option(**target_to_select, timeout=DEFAULT_ACTION_TIMEOUT // 3)
                         logger.info(f"Selected dropdown option by partial label match ('{value_to_select}' in '{opt_text}') using {target_to_select}")
@@ -1446,7 +1711,7 @@ class UniversalFormFiller:
         action_taken = False
         button_type_to_click = 'submit' if is_last_data_step else 'next'
         logger.info(f"Attempting to '{button_type_to_click}' for {'last step' if is_last_data_step else 'current step'}.")
-        action_buttons: List[FormField] = analysis_result.action_buttons.get(button_type_to_click, [])
+        action_buttons: List[FormField] = list(analysis_result.action_buttons.get(button_type_to_click, []))
         
         if is_last_data_step and button_type_to_click == 'submit' and not action_buttons:
              logger.info("No specific 'submit' button found on last step, checking for 'apply' buttons from analysis.")
@@ -1461,7 +1726,7 @@ class UniversalFormFiller:
                         btn_text = ff_button.label_text or ff_button.selector
                         logger.info(f"Clicking analyzed '{button_type_to_click}' button: '{btn_text}' (Selector: {ff_button.selector})")
                         button_loc.scroll_into_view_if_needed(timeout=1000)
-                        button_loc.click(delay=random.randint(50,120), timeout=DEFAULT_ACTION_TIMEOUT)
+                        button_loc.click(delay=self._next_delay(), timeout=DEFAULT_ACTION_TIMEOUT)
                         action_taken = True; break 
                 except Exception as e:
                     logger.warning(f"Error clicking analyzed '{button_type_to_click}' button ({ff_button.selector}): {e}")
@@ -1484,30 +1749,49 @@ class UniversalFormFiller:
         return False
 
     def _submit_form_fallback(self) -> bool:
-        submit_selectors = [
-            "button[type='submit']:visible", "input[type='submit']:visible",
-            "button:has-text('Submit' i):visible", "button:has-text('Apply' i):visible", 
-            "button:has-text('Finish' i):visible", "button:has-text('Complete' i):visible",
-            "[data-automation-id*='submit']:visible", "[data-automation-id*='finish']:visible",
-            "[role='button']:has-text('Submit' i):visible"
-        ]
-        for selector in submit_selectors:
-            try:
-                elements = self.page.locator(selector).all()
-                for button in elements: 
-                    if self._is_element_interactable(button, timeout_ms=200):
-                        btn_text = safe_get_text_content(button).strip()
-                        logger.info(f"Fallback: Clicking generic submit button: '{btn_text}' (Selector: {selector})")
-                        button.scroll_into_view_if_needed(timeout=500)
-                        button.click(delay=random.randint(50,120), timeout=DEFAULT_ACTION_TIMEOUT)
-                        return True
-            except Exception: continue 
+        if not find_first_interactable(self.page, [_SUBMIT_FALLBACK_SELECTOR]): return False
+        try:
+            button = self.page.locator(PICKED_ELEMENT_SELECTOR).first
+            btn_text = safe_get_text_content(button).strip()
+            logger.info(f"Fallback: Clicking generic submit button: '{btn_text}'")
+            button.scroll_into_view_if_needed(timeout=500)
+            button.click(delay=self._next_delay(), timeout=DEFAULT_ACTION_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.debug(f"Error clicking generic submit button: {e}")
         return False
 
+    def _has_session_cookie(self) -> bool:
+        # A context restored from storage_state may already be signed in for this site. Fresh contexts are never
+        # trusted: sites commonly set JSESSIONID-style cookies before sign-in.
+        if not self.restored_session: return False
+        try:
+            cookie_names = {c["name"].lower() for c in self.page.context.cookies(self.page.url)}
+        except PlaywrightError: return False
+        return not cookie_names.isdisjoint(_SESSION_COOKIE_NAMES)
+
+    def _debug_screenshot(self, name: str, final_status: str) -> None:
+        # At most one capture per failure status; the finally block skips its full-page shot for captured statuses.
+        if final_status in self._screenshot_statuses: return
+        if save_debug_screenshot(self.page, name): self._screenshot_statuses.add(final_status)
+
+    def _wait_for_decision_text_gone(self, timeout_ms: int) -> bool:
+        # Returns as soon as the decision prompt leaves the page; the full timeout is only paid when it stays.
+        try:
+            self.page.wait_for_function(_DECISION_TEXT_GONE_JS, arg=_DECISION_TEXT_RE.pattern, polling=250, timeout=timeout_ms)
+            return True
+        except PlaywrightTimeoutError: return False
+        except PlaywrightError as e:
+            logger.debug(f"Error waiting for decision text to clear: {e}")
+            return False
+
     def fill_entire_application(self, form_data_steps: List[Dict[FieldType, Any]], initial_url: str) -> OverallApplicationResult:
         overall_results = OverallApplicationResult(application_url=initial_url, total_steps_provided_in_data=len(form_data_steps))
         
-        decision_handler = DecisionHandler() 
+        decision_handler = _shared_decision_handler()
+        _path_is_file.cache_clear()
+        self._screenshot_statuses.clear()
+        self._run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         logger.info(f"UFF: Starting full application fill for {initial_url}. Total data steps: {len(form_data_steps)}")
         
@@ -1516,9 +1800,9 @@ class UniversalFormFiller:
             logger.info(f"Navigation to {initial_url} complete. Current URL: {self.page.url}")
             if self.config["enable_anti_detection"]: self.anti_detection.random_delay(700, 1500)
 
-            page_after_initial_goto_url = self.page.url.lower()
-            is_on_job_listing = ("job" in page_after_initial_goto_url or "career" in page_after_initial_goto_url or "search/job" in page_after_initial_goto_url) and \
-                                not any(x in page_after_initial_goto_url for x in ["apply", "application", "candidate", "form", "talent", "login", "signin"])
+            page_after_initial_goto_url = self.page.url
+            is_on_job_listing = bool(_JOB_LISTING_URL_RE.search(page_after_initial_goto_url)) and \
+                                not _APPLICATION_URL_RE.search(page_after_initial_goto_url)
 
             if is_on_job_listing:
                 logger.info("Detected job listing page, looking for Apply button...")
@@ -1529,61 +1813,70 @@ class UniversalFormFiller:
                     
                     logger.info("Checking for decision points using DecisionHandler...")
                     decision_was_handled_by_handler = False # Renamed for clarity
+                    decision_text_on_page = False # result of the last content() fetch, reused after the loop
                     max_decision_attempts = 3 
                                 
                     for attempt in range(max_decision_attempts): 
-                        if check_and_handle_decision_points(self.page, decision_handler): 
+                        try:
+                            self.page.wait_for_selector(_DECISION_PAGE_SELECTOR, state="attached", timeout=2000)
+                        except PlaywrightTimeoutError:
+                            # No built-in Workday control; custom and text-only points still get a single probe.
+                            if not decision_handler.has_decision_signal(self.page):
+                                logger.info("DecisionHandler: No decision signals on the page; skipping decision detection.")
+                                decision_text_on_page = False
+                                break
+                        if decision_handler.check_and_handle_decision_points(self.page): 
                             logger.info("DecisionHandler: Successfully handled decision point this attempt.")
                             decision_was_handled_by_handler = True                                        
-                            try:
-                                self.page.wait_for_load_state("networkidle", timeout=10000)
-                            except PlaywrightTimeoutError: 
-                                logger.warning("DecisionHandler: Timeout waiting for networkidle after handling decision.")
-                            except Exception as e_load: 
-                                logger.warning(f"DecisionHandler: Error during wait_for_load_state: {e_load}")
-                            self.page.wait_for_timeout(2000) 
+                            if not self.stability_manager.network.wait_for_idle(timeout_ms=10000):
+                                logger.warning("DecisionHandler: Timeout waiting for network idle after handling decision.")
+                            self._wait_for_decision_text_gone(2000)
                             break 
                         else:
-                            page_text_content_lower = ""
+                            page_text_content = ""
                             try:
-                                page_text_content_lower = self.page.content(timeout=1000).lower() 
+                                page_text_content = self.page.content(timeout=1000)
                             except PlaywrightTimeoutError:
                                 logger.warning("Timeout getting page content during decision retry check.")
                             except Exception as e_page_content:
                                 logger.warning(f"Error getting page content during decision retry check: {e_page_content}")
 
-                            if "start your application" in page_text_content_lower or "please select how you would like to apply" in page_text_content_lower:
+                            decision_text_on_page = bool(_DECISION_TEXT_RE.search(page_text_content))
+                            if decision_text_on_page:
                                 logger.warning(f"DecisionHandler: Still on decision page (or similar text found), attempt {attempt + 1}/{max_decision_attempts}")
-                                self.page.wait_for_timeout(2000) 
+                                self._wait_for_decision_text_gone(2000)
                             else:
                                 logger.info("DecisionHandler: No longer on a recognizable decision page or decision point not found in this attempt.")
                                 break 
                                 
                     if not decision_was_handled_by_handler:
-                        page_text_after_attempts_lower = ""
-                        try:
-                            page_text_after_attempts_lower = self.page.content(timeout=1000).lower()
-                        except: pass # Ignore errors here, just trying to get text for condition
-
-                        if "start your application" in page_text_after_attempts_lower or "please select how you would like to apply" in page_text_after_attempts_lower:
+                        if decision_text_on_page:
                             logger.warning("DecisionHandler: Could not automatically handle decision point after multiple attempts.")
+                            if not self.interactive:
+                                overall_results.errors.append("Decision point requires a manual selection.")
+                                overall_results.final_status = "fail_decision_manual_required"
+                                self._debug_screenshot("debug_decision_manual_required", overall_results.final_status)
+                                return overall_results
                             logger.info("Please manually select an option in the browser, then press Enter here...")
+                            release_asset_blocking(self.page)
                             input("Press Enter after making your selection in the browser...") 
                             logger.info("Resuming after manual intervention for decision point.")
-                            self.stability_manager.wait_for_intelligent_stability(timeout=10000, stability_check_window_ms=1000)
+                            self.stability_manager.network.wait_for_idle(timeout_ms=10000)
                         else:
                             logger.info("DecisionHandler: No specific decision page text found to warrant manual prompt; proceeding.")
                     
                     logger.info(f"Exited decision handling stage. Current URL: {self.page.url}")
-                    self.stability_manager.wait_for_intelligent_stability(timeout=10000, stability_check_window_ms=1000) 
+                    # Page analysis runs its own DOM stability wait; only the network needs to settle here.
+                    self.stability_manager.network.wait_for_idle(timeout_ms=10000)
                 else:
+                    # handle_job_listing_page already saved debug_no_apply_button_found for this state.
                     logger.warning("Could not find/click Apply button on job listing. Proceeding with current page as is.")
-                    try: self.page.screenshot(path="debug_job_listing_no_apply.png", full_page=True)
-                    except: pass
             else: logger.info("Initial page does not seem like a job listing, or already on an application/login page. Skipping 'Apply button' hunt.")
 
-            current_url_for_login_check = self.page.url.lower()
-            is_on_login_page_indicator = any(ind in current_url_for_login_check for ind in ["signin", "login", "auth", "sso", "accountlogin"])
+            is_on_login_page_indicator = bool(_LOGIN_URL_RE.search(self.page.url))
+            if is_on_login_page_indicator and self._has_session_cookie() and not find_first_interactable(self.page, [_PASSWORD_SELECTOR]):
+                logger.info("Login URL, but a session cookie is already present and no password field is shown. Skipping login.")
+                is_on_login_page_indicator = False
             
             if is_on_login_page_indicator:
                 logger.info("Login page indicators detected. Attempting to log in.")
@@ -1603,18 +1896,16 @@ class UniversalFormFiller:
                         overall_results.final_status = "fail_login"
                         if check_for_create_account_option(self.page): 
                             overall_results.errors.append("Account creation might be required.")
-                        try: self.page.screenshot(path="debug_login_failed.png", full_page=True)
-                        except: pass
+                        self._debug_screenshot("debug_login_failed", overall_results.final_status)
                         return overall_results 
                 elif is_on_login_page_indicator : 
                     logger.warning("On login page but no email/password provided in form_data_steps[0].")
                     overall_results.errors.append("Login page, but no credentials given for automated login.")
             else: logger.info("Not immediately identified as a login page, or no credentials to attempt login. Proceeding.")
 
-            if not wait_and_handle_captcha(self.page): 
+            if not handle_page_interrupts(self.page, self._captcha_wait_s): 
                 logger.warning("CAPTCHA detected. Manual intervention may be required. Script will continue but might fail.")
                 overall_results.errors.append("CAPTCHA challenge encountered.")
-            close_popups_comprehensive(self.page) 
 
             for i, current_step_data in enumerate(form_data_steps, 1):
                 overall_results.steps_attempted_on_site = i
@@ -1635,8 +1926,7 @@ class UniversalFormFiller:
                         msg = f"Step {i} (not last): No fields or actions. Possible dead-end or misinterpretation."
                         logger.error(msg); overall_results.errors.append(msg)
                         overall_results.final_status = f"fail_S{i}_no_fields_actions"
-                        try: self.page.screenshot(path=f"debug_S{i}_no_fields_actions.png", full_page=True)
-                        except: pass; break 
+                        self._debug_screenshot(f"debug_S{i}_no_fields_actions", overall_results.final_status); break 
                     else: logger.info(f"Step {i} (last data step): No fields or actions. Assuming this might be a final confirmation page.")
 
                 step_fill_result = self._fill_current_page_fields(current_step_data, current_page_analysis)
@@ -1651,8 +1941,7 @@ class UniversalFormFiller:
                 if not step_ok_to_proceed:
                     msg = f"Step {i} field filling was not successful: {step_fill_result.status_message}. Stopping."
                     logger.error(msg); overall_results.final_status = f"fail_S{i}_fill"
-                    try: self.page.screenshot(path=f"debug_S{i}_fill_fail.png", full_page=True)
-                    except: pass; break
+                    self._debug_screenshot(f"debug_S{i}_fill_fail", overall_results.final_status); break
                 
                 overall_results.steps_successfully_filled +=1
                 is_last_data_step_provided = (i == len(form_data_steps))
@@ -1668,8 +1957,9 @@ class UniversalFormFiller:
                     msg = f"Failed to {action_str}."
                     logger.error(msg); overall_results.errors.append(msg)
                     overall_results.final_status = f"fail_S{i}_{'submit' if effective_last_step_on_site else 'nav'}"
-                    try: self.page.screenshot(path=f"debug_S{i}_nav_submit_fail.png", full_page=True)
-                    except: pass; break 
+                    self._debug_screenshot(f"debug_S{i}_nav_submit_fail", overall_results.final_status); break
+                # Single-page flows keep the URL across steps, so the next step's form must be probed afresh.
+                self._form_selector_cache.clear()
 
                 if effective_last_step_on_site:
                     logger.info("Final submission/navigation initiated for application.")
@@ -1681,10 +1971,9 @@ class UniversalFormFiller:
                     self.stability_manager.wait_for_intelligent_stability(timeout=self.config["navigation_timeout_ms"], stability_check_window_ms=1500)
                     logger.info(f"Page appears stable for next step. New URL: {self.page.url}")
                     if self.config["enable_anti_detection"]: self.anti_detection.random_delay(800, 1800)
-                    if not wait_and_handle_captcha(self.page):
+                    if not handle_page_interrupts(self.page, self._captcha_wait_s):
                          logger.warning(f"CAPTCHA detected on step {i+1}. Manual intervention may be required.")
                          overall_results.errors.append(f"CAPTCHA on step {i+1}")
-                    close_popups_comprehensive(self.page)
 
             if overall_results.final_status == "initiated": 
                 if overall_results.steps_successfully_filled == overall_results.total_steps_provided_in_data:
@@ -1701,81 +1990,112 @@ class UniversalFormFiller:
             overall_results.errors.append(f"General Critical: {str(e)}"); overall_results.final_status = "error_general_critical"
         finally:
             if "fail" in overall_results.final_status or "error" in overall_results.final_status:
-                 if hasattr(self, 'page') and self.page and not self.page.is_closed():
-                    try:
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        self.page.screenshot(path=f"debug_UFF_final_state_{timestamp}.png", full_page=True)
-                        logger.info(f"Saved final state screenshot: debug_UFF_final_state_{timestamp}.png")
-                    except Exception as ss_final_err: logger.error(f"Failed to save final error screenshot: {ss_final_err}")
+                 # Step-level failures already captured this state; only uncaptured (critical) exits get the full-page shot.
+                 if overall_results.final_status not in self._screenshot_statuses and \
+                    hasattr(self, 'page') and self.page and not self.page.is_closed():
+                    save_debug_screenshot(self.page, f"debug_UFF_final_state_{self._run_timestamp}", full_page=True)
+            # Pool workers exit without running atexit hooks, so pending decisions are written per application.
+            decision_handler.flush()
             overall_results.timestamp = time.time() 
         return overall_results
 
 # ========== SETUP AND UTILITIES (Mostly from original) ==========
-def setup_stealth_browser() -> Tuple[Optional[Page], Optional[BrowserContext], Optional[Browser], Optional[Any]]: 
+# Only image/media/font files and analytics hosts are routed. Sync route handlers run only while Python is inside a
+# Playwright call, so a catch-all route would stall every request the user makes during an input() prompt.
+_BLOCKED_ASSET_URL_RE = re.compile(
+    r"\.(?:png|jpe?g|gif|webp|avif|bmp|ico|svg|woff2?|ttf|otf|eot|mp4|webm|mp3|ogg|wav)(?:[?#]|$)"
+    r"|googletagmanager|google-analytics|doubleclick|hotjar|segment\.(?:io|com)|mixpanel", re.I)
+
+# Registered once on the context so every page (including popups) gets it with a single parse per navigation.
+_STEALTH_INIT_JS = """
+Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+Object.defineProperty(navigator, 'plugins', {get: () => [1,2,3,4,5].map(i => ({name: `Plugin ${i}`, filename: `plugin${i}.dll`}))});
+Object.defineProperty(Notification, 'permission', {get: () => 'denied'});
+"""
+
+def _route_block_assets(route) -> None:
+    # The URL pattern already did the filtering; stylesheets never match it, since visibility checks and honeypot
+    # filtering depend on computed styles.
+    route.abort()
+
+def release_asset_blocking(page: Page) -> None:
+    """Drop the asset route before handing the browser to the user, so nothing they trigger waits on Python."""
+    try: page.context.unroute(_BLOCKED_ASSET_URL_RE, _route_block_assets)
+    except PlaywrightError as e: logger.debug(f"Could not remove asset-blocking route: {e}")
+
+def launch_browser() -> Tuple[Any, Browser]:
+    """Start Playwright and Chromium; the (playwright, browser) pair can host many stealth contexts."""
     from playwright.sync_api import sync_playwright
-    playwright_instance, browser_instance, browser_context_instance = None, None, None
+    playwright_instance = sync_playwright().start()
     try:
-        playwright_instance = sync_playwright().start()
         browser_instance = playwright_instance.chromium.launch(
             headless=False, 
             args=['--no-sandbox','--disable-dev-shm-usage','--disable-blink-features=AutomationControlled','--disable-gpu','--disable-extensions','--disable-plugins-discovery','--start-maximized'])
-        browser_context_instance = browser_instance.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36', 
-            viewport={'width': 1366, 'height': 768}, java_script_enabled=True, bypass_csp=True, 
-            extra_http_headers={'Accept-Language': 'en-US,en;q=0.9', 'DNT': '1'})
+    except Exception:
+        playwright_instance.stop()
+        raise
+    return playwright_instance, browser_instance
+
+def new_stealth_context(browser_instance: Browser, block_assets: bool = BLOCK_ASSETS,
+                        storage_state: Optional[str] = None) -> Tuple[BrowserContext, Page]:
+    """Fresh isolated context (own cookies, storage and cache) with the stealth init scripts applied.
+    storage_state points at a saved Playwright state file to start already logged in."""
+    browser_context_instance = browser_instance.new_context(
+        user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36', 
+        viewport={'width': 1366, 'height': 768}, java_script_enabled=True, bypass_csp=True, 
+        extra_http_headers={'Accept-Language': 'en-US,en;q=0.9', 'DNT': '1'}, storage_state=storage_state)
+    try:
+        if block_assets:
+            browser_context_instance.route(_BLOCKED_ASSET_URL_RE, _route_block_assets)
+        browser_context_instance.add_init_script(_STEALTH_INIT_JS)
+        browser_context_instance.add_init_script(_STABILITY_OBSERVER_JS)
         page = browser_context_instance.new_page()
-        page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        page.add_init_script("Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']})")
-        page.add_init_script("Object.defineProperty(navigator, 'plugins', {get: () => [1,2,3,4,5].map(i => ({name: `Plugin ${i}`, filename: `plugin${i}.dll`}))})")
-        page.add_init_script("Object.defineProperty(Notification, 'permission', {get: () => 'denied'})") 
+    except Exception:
+        browser_context_instance.close()
+        raise
+    return browser_context_instance, page
+
+def setup_stealth_browser(block_assets: bool = BLOCK_ASSETS, storage_state: Optional[str] = None) -> Tuple[Optional[Page], Optional[BrowserContext], Optional[Browser], Optional[Any]]: 
+    playwright_instance, browser_instance = None, None
+    try:
+        playwright_instance, browser_instance = launch_browser()
+        browser_context_instance, page = new_stealth_context(browser_instance, block_assets, storage_state)
         logger.info("Stealth browser setup completed.")
         return page, browser_context_instance, browser_instance, playwright_instance 
     except Exception as e:
         logger.error(f"Error setting up stealth browser: {e}", exc_info=True)
-        if browser_context_instance:
-            try:
-                browser_context_instance.close()
-            except Exception as e_close_ctx:
-                logger.warning(f"Exception during browser_context_instance.close() on error: {e_close_ctx}")
-        if browser_instance and browser_instance.is_connected():
-            try:
-                browser_instance.close()
-            except Exception as e_close_browser:
-                logger.warning(f"Exception during browser_instance.close() on error: {e_close_browser}")
-        if playwright_instance:
-            try:
-                playwright_instance.stop()
-            except Exception as e_stop_pw:
-                logger.warning(f"Exception during playwright_instance.stop() on error: {e_stop_pw}")
+        _teardown_browser(None, browser_instance, playwright_instance)
         return None, None, None, None
 
 
+_CAPTCHA_SELECTOR = ", ".join((
+    "iframe[src*='recaptcha']", "iframe[title*='reCAPTCHA']", "[class*='g-recaptcha']",
+    "iframe[src*='hcaptcha']", "iframe[title*='hcaptcha']", "[class*='h-captcha']",
+    "iframe[src*='arkoselabs.com']", "iframe[title*='arkose']", "[class*='arkose']",
+    "div#turnstile-widget", "iframe[src*='challenges.cloudflare.com']",
+    "[data-testid='captcha']", "[aria-label*='captcha' i]",
+))
+# Title (or tag) of the first visible CAPTCHA match, or null.
+_FIRST_VISIBLE_CAPTCHA_JS = """els => {
+    const el = els.find(e => { const r = e.getBoundingClientRect(); return r.width > 0 && r.height > 0 && getComputedStyle(e).visibility !== 'hidden'; });
+    return el ? (el.getAttribute('title') || el.tagName.toLowerCase()) : null;
+}"""
+
 def wait_and_handle_captcha(page: Page, timeout_sec: int = 7) -> bool: 
     logger.info("Checking for CAPTCHA elements...")
-    captcha_selectors = [
-        "iframe[src*='recaptcha']", "iframe[title*='reCAPTCHA']", "[class*='g-recaptcha']",
-        "iframe[src*='hcaptcha']", "iframe[title*='hcaptcha']", "[class*='h-captcha']",
-        "iframe[src*='arkoselabs.com']", "iframe[title*='arkose']", "[class*='arkose']", 
-        "div#turnstile-widget", "iframe[src*='challenges.cloudflare.com']", 
-        "[data-testid='captcha']", "[aria-label*='captcha' i]"
-    ]
     page.wait_for_timeout(500)
-    found_captcha = False
-    for selector in captcha_selectors:
-        try:
-            elements = page.locator(selector)
-            if elements.count() > 0:
-                for i in range(elements.count()):
-                    el = elements.nth(i)
-                    if el.is_visible(timeout=500): 
-                        logger.warning(f"CAPTCHA detected with selector: {selector} (Element: {safe_get_attribute(el,'title') or safe_get_tag_name(el)})")
-                        found_captcha = True; break
-            if found_captcha: break
-        except PlaywrightTimeoutError: logger.debug(f"Captcha selector {selector} not visible in time.")
-        except Exception as e: 
-            logger.debug(f"Error checking CAPTCHA selector {selector}: {e}")
-            if page.is_closed(): return True 
+    found_captcha = None
+    try:
+        found_captcha = page.locator(_CAPTCHA_SELECTOR).evaluate_all(_FIRST_VISIBLE_CAPTCHA_JS)
+    except Exception as e: 
+        logger.debug(f"Error checking CAPTCHA selectors: {e}")
+        if page.is_closed(): return True 
+    return _wait_out_captcha(page, found_captcha, timeout_sec)
+
+def _wait_out_captcha(page: Page, found_captcha: Optional[str], timeout_sec: int) -> bool:
     if found_captcha:
+        logger.warning(f"CAPTCHA detected (Element: {found_captcha})")
         logger.info(f"CAPTCHA present. Please solve it manually in the browser window within {timeout_sec} seconds.")
         page.wait_for_timeout(timeout_sec * 1000) 
         logger.info("Resuming after CAPTCHA wait. Hopefully it was solved.")
@@ -1783,43 +2103,205 @@ def wait_and_handle_captcha(page: Page, timeout_sec: int = 7) -> bool:
     logger.info("No obvious CAPTCHA elements detected.")
     return True 
 
+# Cookie banners, close/dismiss buttons and survey/notification prompts, probed as one union selector.
+_POPUP_CLOSE_SELECTOR = ", ".join((
+    "button:has-text('Accept all cookies')", "button:has-text('Allow Cookies')",
+    "button:has-text('Got it')", "button:has-text('I accept')",
+    "button[id*='cookie'][id*='accept']", "[aria-label*='accept cookie' i]",
+    "button[aria-label*='close' i]", "button[aria-label*='dismiss' i]",
+    "button:text-is('×')", "button:text-is('X')",
+    "button[class*='close' i][class*='button' i]", "button[id*='close' i]",
+    "span[aria-label*='close' i]",
+    "button:has-text('No thanks')", "button:has-text('Maybe later')",
+    "button:has-text(\"Don't allow\")",
+))
+
+_POPUP_DESCRIPTION_JS = "el => (el.textContent || '').trim().slice(0, 40) || el.getAttribute('aria-label') || ''"
+
 def close_popups_comprehensive(page: Page) -> None:
     logger.info("Checking for common popups/modals/cookie banners to close...")
-    popup_close_actions = [
-        ("button:has-text('Accept all cookies' i)", "Accept All Cookies"),("button:has-text('Allow Cookies' i)", "Allow Cookies"),
-        ("button:has-text('Got it' i)", "Got It (Cookie)"),("button:has-text('I accept' i)", "I Accept (Cookie)"),
-        ("button[id*='cookie'][id*='accept']", "Cookie Accept by ID"),("[aria-label*='accept cookie' i]", "Cookie Accept by Aria"),
-        ("button[aria-label*='close' i]", "Close by Aria"),("button[aria-label*='dismiss' i]", "Dismiss by Aria"),
-        ("button:has-text('×')", "Close with × symbol"), ("button:has-text('X')", "Close with X char"),
-        ("button[class*='close' i][class*='button' i]", "Close by Class"),("button[id*='close' i]", "Close by ID"),
-        ("span[aria-label*='close' i]", "Close Span by Aria"), 
-        ("button:has-text('No thanks' i)", "No Thanks (Survey)"),("button:has-text('Maybe later' i)", "Maybe Later (Survey)"),
-        ("button:has-text('Don\\'t allow' i)", "Don't Allow (Notification)"), 
-    ]
     max_popups_to_close_in_one_go = 3; closed_count = 0
     for _ in range(max_popups_to_close_in_one_go): 
-        popup_closed_this_iteration = False
-        for selector, description in popup_close_actions:
-            try:
-                elements = page.locator(selector).all()
-                for element in elements:
-                    if element.is_visible(timeout=200) and element.is_enabled(timeout=200):
-                        logger.info(f"Attempting to close popup: '{description}' with selector: {selector}")
-                        element.click(delay=random.randint(30,80), timeout=1000) 
-                        page.wait_for_timeout(INTERACTION_DELAY_MS) 
-                        logger.info(f"Clicked '{description}' popup/banner element.")
-                        popup_closed_this_iteration = True; closed_count += 1; break 
-            except PlaywrightTimeoutError: logger.debug(f"Popup action '{description}' ({selector}) not completed in time or element not interactable.")
-            except PlaywrightError as pe: logger.debug(f"PlaywrightError with popup action '{description}' ({selector}): {pe}")
-            except Exception as e: logger.debug(f"Generic error with popup action '{description}' ({selector}): {e}")
-            if popup_closed_this_iteration and closed_count < max_popups_to_close_in_one_go :
-                 page.wait_for_timeout(INTERACTION_DELAY_MS*2); break 
-        if not popup_closed_this_iteration: break 
+        # One evaluate_all finds the first visible+enabled close control across every selector.
+        if not find_first_interactable(page, [_POPUP_CLOSE_SELECTOR]): break
+        try:
+            element = page.locator(PICKED_ELEMENT_SELECTOR).first
+            description = element.evaluate(_POPUP_DESCRIPTION_JS)
+            logger.info(f"Attempting to close popup/banner: '{description}'")
+            element.click(delay=random.randint(30,80), timeout=1000) 
+            page.wait_for_timeout(INTERACTION_DELAY_MS) 
+            closed_count += 1
+        except PlaywrightTimeoutError: logger.debug("Popup close element not clickable in time."); break
+        except PlaywrightError as pe: logger.debug(f"PlaywrightError closing popup: {pe}"); break
+        except Exception as e: logger.debug(f"Generic error closing popup: {e}"); break
+        if closed_count < max_popups_to_close_in_one_go: page.wait_for_timeout(INTERACTION_DELAY_MS*2)
     if closed_count > 0: logger.info(f"Closed {closed_count} popup(s)/banner(s) in total.")
     else: logger.info("No common popups/banners found or closed.")
 
+# CAPTCHA selectors are plain CSS, so el.matches() can split one union query back into its two halves.
+_INTERRUPTS_SNAPSHOT_JS = """(els, captchaSel) => {
+    const shown = e => { const r = e.getBoundingClientRect(); return r.width > 0 && r.height > 0 && getComputedStyle(e).visibility !== 'hidden'; };
+    const captcha = els.find(e => e.matches(captchaSel) && shown(e));
+    return {captcha: captcha ? (captcha.getAttribute('title') || captcha.tagName.toLowerCase()) : null,
+            popup: els.some(e => !e.matches(captchaSel) && !e.disabled && shown(e))};
+}"""
+
+def handle_page_interrupts(page: Page, captcha_timeout_sec: int = 7) -> bool:
+    """CAPTCHA check and popup dismissal driven by one DOM snapshot. Returns False if a CAPTCHA was seen."""
+    page.wait_for_timeout(500)
+    try:
+        snapshot = page.locator(f"{_CAPTCHA_SELECTOR}, {_POPUP_CLOSE_SELECTOR}").evaluate_all(_INTERRUPTS_SNAPSHOT_JS, _CAPTCHA_SELECTOR)
+    except Exception as e:
+        logger.debug(f"Interrupt snapshot failed, checking CAPTCHA and popups separately: {e}")
+        if page.is_closed(): return True
+        captcha_free = wait_and_handle_captcha(page, captcha_timeout_sec)
+        close_popups_comprehensive(page)
+        return captcha_free
+    captcha_free = _wait_out_captcha(page, snapshot.get('captcha'), captcha_timeout_sec)
+    if snapshot.get('popup') or not captcha_free: close_popups_comprehensive(page)
+    else: logger.info("No common popups/banners found or closed.")
+    return captcha_free
+
+def _teardown_browser(browser_context: Optional[BrowserContext], browser_instance: Optional[Browser], playwright_instance: Optional[Any]) -> None:
+    logger.info("Initiating cleanup: closing browser and Playwright...")
+    
+    if browser_context: 
+        try:
+            browser_context.close() 
+            logger.debug("Attempted to close browser context.")
+        except Exception as e_ctx_close:
+            logger.warning(f"Exception during browser_context.close(): {e_ctx_close}")
+
+    if browser_instance: 
+        try:
+            if browser_instance.is_connected():
+                browser_instance.close()
+                logger.debug("Browser instance closed.")
+        except Exception as e_browser_close:
+            logger.warning(f"Error closing browser instance: {e_browser_close}")
+
+    if playwright_instance: 
+        try:
+            playwright_instance.stop() 
+            logger.info("Playwright instance stopped.")
+        except Exception as e_pw_stop:
+            logger.warning(f"Error stopping Playwright instance: {e_pw_stop}")
+
+def run_application(job_url: str, form_data_steps: List[Dict[FieldType, Any]],
+                    browser_instance: Optional[Browser] = None, storage_state: Optional[str] = None,
+                    interactive: bool = False) -> Optional[OverallApplicationResult]:
+    """Run one application end-to-end. Given a running browser, only a fresh context is opened and closed;
+    otherwise a dedicated browser is launched and torn down afterwards. storage_state restores a saved login.
+    Unless interactive is set, steps that would prompt on the terminal end the run with a fail_* status instead."""
+    owns_browser = browser_instance is None
+    playwright_instance = None
+    if owns_browser:
+        page, browser_context, browser_instance, playwright_instance = setup_stealth_browser(storage_state=storage_state)
+    else:
+        try:
+            browser_context, page = new_stealth_context(browser_instance, storage_state=storage_state)
+        except Exception as e:
+            logger.error(f"Error opening browser context for {job_url}: {e}")
+            browser_context, page = None, None
+    if not page:
+        logger.error(f"Failed to initialize browser for {job_url}.")
+        return None
+    try:
+        return UniversalFormFiller(page, restored_session=storage_state is not None,
+                                   interactive=interactive).fill_entire_application(form_data_steps, job_url)
+    except Exception as e:
+        logger.critical(f"Unhandled exception while applying to {job_url}: {e}", exc_info=True)
+        return None
+    finally:
+        if owns_browser:
+            _teardown_browser(browser_context, browser_instance, playwright_instance)
+        else:
+            try: browser_context.close()
+            except Exception as e_ctx_close: logger.warning(f"Exception during browser_context.close(): {e_ctx_close}")
+
+def _run_application_batch(jobs: List[Tuple[str, List[Dict[FieldType, Any]]]]) -> List[Optional[OverallApplicationResult]]:
+    # Chromium starts once per worker; each job still gets its own context, so cookies and storage never leak between jobs.
+    try:
+        playwright_instance, browser_instance = launch_browser()
+    except Exception as e:
+        logger.error(f"Failed to launch browser for batch of {len(jobs)} job(s): {e}", exc_info=True)
+        return [None] * len(jobs)
+    try:
+        return [run_application(job_url, steps, browser_instance, interactive=False) for job_url, steps in jobs]
+    finally:
+        _teardown_browser(None, browser_instance, playwright_instance)
+
+def run_applications(jobs: List[Tuple[str, List[Dict[FieldType, Any]]]], max_workers: int = 4,
+                     use_processes: bool = False) -> List[Optional[OverallApplicationResult]]:
+    """Process (job_url, form_data_steps) pairs with bounded concurrency, results in input order.
+    The sync Playwright API is bound to the thread that started it, so each worker owns its own driver and browser,
+    reused across its share of the jobs. use_processes runs workers in separate processes, keeping field analysis
+    off a shared GIL."""
+    batches = [jobs[i::max_workers] for i in range(min(max_workers, len(jobs)))]
+    log_listener = None
+    if use_processes:
+        if not logging.getLogger().handlers: _configure_logging()
+        log_queue = multiprocessing.Queue()
+        log_listener = QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+        log_listener.start()
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_configure_worker_logging, initargs=(log_queue,))
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="apply")
+    results: List[Optional[OverallApplicationResult]] = [None] * len(jobs)
+    try:
+        with executor:
+            for i, batch_results in enumerate(executor.map(_run_application_batch, batches)):
+                results[i::len(batches)] = batch_results
+    finally:
+        if log_listener: log_listener.stop()
+    return results
+
+def load_jobs_file(path: str) -> List[Tuple[str, List[Dict[FieldType, Any]]]]:
+    """Read [{"url": ..., "form_data_steps": [{"email": ..., "first_name": ...}, ...]}, ...]; step keys are FieldType values."""
+    with open(path, 'r', encoding='utf-8') as f:
+        raw_jobs = json.load(f)
+    return [(job["url"], [{FieldType(k): v for k, v in step.items()} for step in job.get("form_data_steps", [])])
+            for job in raw_jobs]
+
+def _json_default(obj: Any) -> Any:
+    # Results are plain dataclasses flattened by asdict(); only leaf types json can't encode reach here.
+    if isinstance(obj, Enum): return obj.value
+    if isinstance(obj, Path): return str(obj)
+    if isinstance(obj, Locator): return "<Locator>"
+    return str(obj)
+
+_DUMMY_RESUME_PDF = b"%PDF-1.0\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj 2 0 obj<</Type/Pages/Count 1/Kids[3 0 R]>>endobj 3 0 obj<</Type/Page/MediaBox[0 0 612 792]>>endobj\nxref\n0 4\n0000000000 65535 f\n0000000010 00000 n\n0000000056 00000 n\n0000000115 00000 n\ntrailer<</Size 4/Root 1 0 R>>\nstartxref\n164\n%%EOF"
+
+@lru_cache(maxsize=1)
+def _dummy_resume_path() -> Optional[Path]:
+    """Path to the placeholder resume, created once per process. The write goes to a private temp file
+    and is renamed into place, so concurrent workers never see (or produce) a half-written PDF."""
+    resume_file_path = Path(__file__).resolve().parent / "dummy_resume.pdf"
+    if not resume_file_path.exists():
+        tmp_path = resume_file_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(_DUMMY_RESUME_PDF)
+            os.replace(tmp_path, resume_file_path)
+            logger.info(f"Created dummy resume: {resume_file_path}")
+        except OSError as e:
+            logger.error(f"Could not create dummy resume at {resume_file_path}: {e}")
+            try: tmp_path.unlink()
+            except OSError: pass
+    return resume_file_path if resume_file_path.exists() else None
+
 # ========== MAIN EXECUTION ==========
-def main():
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Fill job application forms with Playwright.")
+    parser.add_argument("--jobs", help="JSON file of jobs to run as a batch (see load_jobs_file)")
+    parser.add_argument("--workers", type=int, default=4, help="parallel worker processes for --jobs")
+    args = parser.parse_args(argv)
+    _configure_logging()
+    if args.jobs:
+        jobs = load_jobs_file(args.jobs)
+        logger.info(f"Batch mode: {len(jobs)} job(s) from {args.jobs} across {args.workers} worker process(es).")
+        for (job_url, _), result in zip(jobs, run_applications(jobs, max_workers=args.workers, use_processes=True)):
+            logger.info(f"{job_url}: {result.final_status if result else 'browser setup failed / crashed'}")
+        return
     logger.info("Script started. Initializing UniversalFormFiller...")
     page, browser_context, browser_instance, playwright_instance = setup_stealth_browser()
     
@@ -1836,15 +2318,8 @@ def main():
         FieldType.CITY: "Anytown", FieldType.STATE: "CA", 
         FieldType.ZIP_CODE: f"{random.randint(10000,99999)}"
     }
-    resume_dir = Path(__file__).resolve().parent
-    resume_file_path = resume_dir / "dummy_resume.pdf"
-    if not resume_file_path.exists():
-        try:
-            with open(resume_file_path, "wb") as f:
-                f.write(b"%PDF-1.0\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj 2 0 obj<</Type/Pages/Count 1/Kids[3 0 R]>>endobj 3 0 obj<</Type/Page/MediaBox[0 0 612 792]>>endobj\nxref\n0 4\n0000000000 65535 f\n0000000010 00000 n\n0000000056 00000 n\n0000000115 00000 n\ntrailer<</Size 4/Root 1 0 R>>\nstartxref\n164\n%%EOF")
-            logger.info(f"Created dummy resume: {resume_file_path}")
-        except IOError as e: logger.error(f"Could not create dummy resume at {resume_file_path}: {e}")
-    if resume_file_path.exists(): applicant_data_step1[FieldType.RESUME_FILE] = str(resume_file_path) 
+    resume_file_path = _dummy_resume_path()
+    if resume_file_path: applicant_data_step1[FieldType.RESUME_FILE] = str(resume_file_path) 
     form_data_all_steps = [applicant_data_step1]
     filler = UniversalFormFiller(page) 
     overall_results: Optional[OverallApplicationResult] = None
@@ -1855,17 +2330,7 @@ def main():
     try:
         overall_results = filler.fill_entire_application(form_data_all_steps, target_job_url)
         logger.info(f"\n{'='*20} FINAL APPLICATION OVERALL RESULTS {'='*20}")
-        def default_serializer(obj):
-            if isinstance(obj, Locator): 
-                try: return f"<Locator for '{generate_robust_selector(obj)}'>"
-                except: return "<Locator object (not easily serializable)>"
-            if isinstance(obj, Path): return str(obj)
-            if isinstance(obj, Enum): return obj.value
-            if hasattr(obj, '__dict__') and not isinstance(obj, (type, Callable)):
-                return {k: v for k, v in vars(obj).items() if k != 'element'} 
-            try: return str(obj) 
-            except Exception: return f"<Object of type {type(obj).__name__} not serializable>"
-        results_json_str = json.dumps(overall_results, indent=2, default=default_serializer)
+        results_json_str = json.dumps(asdict(overall_results), indent=2, default=_json_default)
         logger.info(results_json_str)
         logger.info(f"{'='*60}")
         
@@ -1884,6 +2349,7 @@ def main():
                      browser_still_active = True
         
         if browser_still_active and not filler.config.get("headless", False): 
+            release_asset_blocking(page)
             input("\nReview browser (if open) and press Enter to close and end script...")
         else:
             logger.info("Browser already closed or in headless mode. Script will end.")
@@ -1891,36 +2357,11 @@ def main():
     except Exception as e_main:
         logger.critical(f"Critical unhandled exception in main execution block: {e_main}", exc_info=True)
         if page and not page.is_closed():
-            try:
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                page.screenshot(path=f"critical_error_main_final_{timestamp}.png", full_page=True)
-                logger.info(f"Saved screenshot for critical main error: critical_error_main_final_{timestamp}.png")
-            except: pass 
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            save_debug_screenshot(page, f"critical_error_main_final_{timestamp}", full_page=True)
             
     finally:
-        logger.info("Initiating cleanup: closing browser and Playwright...")
-        
-        if browser_context: 
-            try:
-                browser_context.close() 
-                logger.debug("Attempted to close browser context.")
-            except Exception as e_ctx_close:
-                logger.warning(f"Exception during browser_context.close(): {e_ctx_close}")
-
-        if browser_instance: 
-            try:
-                if browser_instance.is_connected():
-                    browser_instance.close()
-                    logger.debug("Browser instance closed.")
-            except Exception as e_browser_close:
-                logger.warning(f"Error closing browser instance: {e_browser_close}")
-
-        if playwright_instance: 
-            try:
-                playwright_instance.stop() 
-                logger.info("Playwright instance stopped.")
-            except Exception as e_pw_stop:
-                logger.warning(f"Error stopping Playwright instance: {e_pw_stop}")
+        _teardown_browser(browser_context, browser_instance, playwright_instance)
 
 if __name__ == "__main__":
     main()
@@ -4,23 +4,173 @@ Decision Handler System for Form Filler
 Handles decision points like application method selection with stored preferences
 """
 
+import atexit
 import json
 import logging
+import os
+import threading
+import weakref
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any 
+from typing import Dict, List, Optional, Any, Tuple
 from playwright.sync_api import Page, Locator, TimeoutError # CORRECTED IMPORT
 import time
+from functools import cached_property
 import re 
 
 logger = logging.getLogger(__name__)
 
+_CONTENT_CACHE_TTL_S = 0.5
+_OPTION_CLICK_TIMEOUT_MS = 1500
+_PREFERENCES_FLUSH_INTERVAL_S = 1.0
+# Live handlers with possibly unflushed preferences; one exit hook flushes them all instead of one hook per instance.
+_LIVE_HANDLERS: "weakref.WeakSet[DecisionHandler]" = weakref.WeakSet()
+
+def _flush_live_handlers():
+    for handler in list(_LIVE_HANDLERS):
+        handler.flush()
+
+atexit.register(_flush_live_handlers)
+
+_CLICKABLE_CANDIDATES_SELECTOR = "button:visible, a[role='button']:visible, [data-automation-id*='button']:visible, [data-automation-id*='action']:visible"
+_CLICKABLE_LABELS_JS = """els => els.slice(0, 16).map((e, i) =>
+    (e.textContent || e.getAttribute('aria-label') || e.getAttribute('data-automation-id') || `Element_${i}`).trim()
+).filter(t => t && t.length < 70)"""
+# Failure-path screenshots are opt-in and viewport-only; a full-page PNG of a long Workday form can take seconds and MBs.
+_DEBUG_SCREENSHOTS = os.getenv("FORM_FILLER_DEBUG_SHOTS") == "1"
+
+def _debug_screenshot(page: Page, path: str):
+    page.screenshot(path=path, full_page=False, type='jpeg', quality=60)
+
+def _first_visible(page: Page, selector: str) -> Optional[Locator]:
+    # click() already waits for enabled/stable; the count() only keeps absent selectors from paying the click timeout.
+    loc = page.locator(f"{selector} >> visible=true").first
+    return loc if loc.count() > 0 else None
+
+def _wait_after_option_click(page: Page, option_def: Optional[Dict[str, Any]] = None):
+    # Returns once the click's navigation settles instead of sleeping a fixed 3s; an option may name the
+    # element that marks its next page via "post_click_sentinel_selector".
+    try:
+        page.wait_for_load_state('domcontentloaded', timeout=5000)
+        sentinel = option_def.get("post_click_sentinel_selector") if option_def else None
+        if sentinel: page.locator(sentinel).first.wait_for(timeout=5000)
+        else: page.wait_for_load_state('networkidle', timeout=2000)
+    except TimeoutError:
+        logger.debug("Timed out waiting for the page to settle after clicking a decision option.")
+
+# Plain-CSS controls that only appear on the built-in decision pages; callers can wait on their
+# union once to tell whether a decision page is up at all before running the full detection.
+DECISION_PAGE_SELECTORS = (
+    "[data-automation-id='autofillWithResume']",
+    "[data-automation-id='autoFillResumeButton']",
+    "[data-automation-id='applyManually']",
+    "[data-automation-id='useMyLastApplication']",
+    "[aria-label*='Autofill with Resume' i]",
+    "[aria-label*='Apply Manually' i]",
+    "[aria-label*='Use My Last Application' i]",
+    "button[data-automation-id*='continue' i]",
+    "button[data-automation-id*='next' i]",
+)
+
+# One in-page pass for a batch of [indicator pattern, lowered option texts] criteria; each yields [does the body text
+# match the pattern, how many of the texts appear on at least one button-like control]. :text-matches/:has-text are
+# Playwright-only, so both are done by hand here.
+_DECISION_PROBE_JS = """(criteria) => {
+    const text = document.body ? (document.body.textContent || '') : '';
+    let labels = null;
+    return criteria.map(([textPattern, buttonTexts]) => {
+        const textMatch = !!textPattern && new RegExp(textPattern, 'i').test(text);
+        if (!buttonTexts.length) return [textMatch, 0];
+        labels = labels || Array.from(document.querySelectorAll("button, a[role='button'], [data-automation-id*='button']"),
+                                      el => (el.textContent || '').toLowerCase());
+        return [textMatch, buttonTexts.filter(b => labels.some(t => t.includes(b))).length];
+    });
+}"""
+
+def _probe_batch(page: Page, criteria: List[Tuple[str, Tuple[str, ...]]]) -> List[Tuple[bool, int]]:
+    results = page.evaluate(_DECISION_PROBE_JS, [[pattern, list(texts)] for pattern, texts in criteria])
+    return [(bool(text_match), int(button_count)) for text_match, button_count in results]
+
+def _probe_page(page: Page, text_pattern: str, button_texts: Tuple[str, ...]) -> Tuple[bool, int]:
+    return _probe_batch(page, [(text_pattern, button_texts)])[0]
+
+def _indicator_pattern(texts) -> str:
+    return '|'.join(re.escape(t) for t in texts)
+
+_METHOD_SELECTION_INDICATORS = ("Start Your Application", "Please select how you would like to apply", "How would you like to apply?")
+_METHOD_SELECTION_INDICATOR_PATTERN = _indicator_pattern(_METHOD_SELECTION_INDICATORS)
+_AUTOFILL_OPTION_SELECTORS = (
+    "a[data-automation-id='autofillWithResume']",      
+    "button[data-automation-id='autofillWithResume']", 
+    "a[data-automation-id='autoFillResumeButton']", 
+    "button[data-automation-id='autoFillResumeButton']",
+    "button:text-matches('autofill.*resume', 'i')", 
+    "a:text-matches('autofill.*resume', 'i')",     
+    "[aria-label*='Autofill with Resume' i]",
+)
+_AUTOFILL_OPTION_SELECTOR = ", ".join(_AUTOFILL_OPTION_SELECTORS)
+
 class DecisionPoint:
     """Represents a decision point in the application flow"""
+    __slots__ = ("name", "description", "detection_criteria", "options", "_text_indicator_regex",
+                 "_lower_button_texts", "_required_buttons", "_lower_url_patterns", "_option_union_selectors", "_require_url_match",
+                 "_options_by_name", "_default_option", "_detect")
+
     def __init__(self, name: str, description: str, detection_criteria: Dict[str, Any], options: List[Dict[str, Any]]):
         self.name = name
         self.description = description
         self.detection_criteria = detection_criteria
         self.options = options
+        # Selector strings are fixed per definition, so they are built once here rather than on every detection pass.
+        text_indicators = detection_criteria.get("text_indicators", [])
+        # The regex source doubles as the in-page probe pattern, so both criteria cost one evaluate per detection.
+        self._text_indicator_regex: Optional[re.Pattern] = re.compile(_indicator_pattern(text_indicators), re.IGNORECASE) if text_indicators else None
+        button_options_texts = detection_criteria.get("button_options_texts", [])
+        self._lower_button_texts: Tuple[str, ...] = tuple(t.lower() for t in button_options_texts)
+        self._required_buttons = max(1, len(button_options_texts) // 2) if button_options_texts else 0
+        self._lower_url_patterns: List[str] = [p.lower() for p in detection_criteria.get("url_patterns", [])]
+        # Every selector of an option targets the same control, so one union locator stands in for trying them in turn.
+        self._option_union_selectors: Dict[str, str] = {o["name"]: ", ".join(o.get("selectors", [])) for o in options}
+        self._options_by_name: Dict[str, Dict[str, Any]] = {o["name"]: o for o in options}
+        self._default_option: Optional[Dict[str, Any]] = next((o for o in options if o.get("preferred", False)), None)
+        # URL-gated points are skipped outright on other sites; set require_url_match False to allow text-only matches.
+        self._require_url_match: bool = detection_criteria.get("require_url_match", bool(self._lower_url_patterns))
+        self._detect = self._make_detector()
+
+    def _make_detector(self):
+        # Everything detection needs is fixed per definition, so it is bound into a closure once; the handler only
+        # supplies its probe/content caches and whether the URL index matched this point.
+        name = self.name
+        text_regex = self._text_indicator_regex
+        text_pattern = text_regex.pattern if text_regex else ""
+        button_texts = self._lower_button_texts
+        required_buttons = self._required_buttons
+
+        def detect(handler: "DecisionHandler", page: Page, url_match: bool) -> bool:
+            text_match = False
+            actual_buttons_found_count = 0
+            # Counts distinct option texts found, so a repeated control (top and bottom "Next") counts once.
+            try:
+                text_match, actual_buttons_found_count = handler._cached_probe(page, text_pattern, button_texts)
+                if text_match: logger.debug(f"  Text indicator found for {name}.")
+            except Exception as e_probe:
+                logger.debug(f"  Error probing page for {name}: {e_probe}")
+
+            if not text_match and text_regex is not None:
+                try:
+                    text_match = bool(text_regex.search(handler._cached_content(page)))
+                    if text_match: logger.debug(f"  Text indicator found via page.content() for {name}.")
+                except TimeoutError: # USE CORRECTED EXCEPTION NAME
+                    logger.warning("Timeout getting page.content() in detect_decision_point")
+                except Exception as e_content:
+                    logger.warning(f"Error getting page.content() in detect_decision_point: {e_content}")
+
+            buttons_criterion_met = actual_buttons_found_count >= required_buttons
+            if required_buttons:
+                logger.debug(f"  For {name}: URLMatch={url_match}, TextMatch={text_match}, ButtonsFound={actual_buttons_found_count}/{required_buttons} required, CriterionMet={buttons_criterion_met}")
+            return (url_match or text_match) and buttons_criterion_met
+
+        return detect
 
 class DecisionHandler:
     """Handles decision points with stored preferences"""
@@ -28,6 +178,22 @@ class DecisionHandler:
     def __init__(self, preferences_file: str = "form_filler_preferences.json"):
         self.preferences_file = Path(preferences_file)
         self.preferences = self._load_preferences()
+        # store_decision only marks the preferences dirty; writes are batched to one per flush interval plus one at exit.
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        # Decisions stored since the last save; they win over the on-disk copy when the two are merged.
+        self._unsaved_decisions: Dict[str, str] = {}
+        _LIVE_HANDLERS.add(self)
+        # (url, monotonic fetch time, page.content()) shared by every decision point in one detection sweep.
+        self._content_cache: Tuple[str, float, str] = ("", 0.0, "")
+        # (pattern, button texts) -> (monotonic probe time, result) for self._probe_url; repeated checks of the same
+        # criteria within one sweep (or by the specific handler) reuse the in-page probe.
+        self._probe_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[float, Tuple[bool, int]]] = {}
+        self._probe_url = ""
+
+    @cached_property
+    def decision_points(self) -> List[DecisionPoint]:
+        # Built on first use so runs that never reach a decision page skip the definitions and their selector setup.
         custom_definitions = self.preferences.get("custom_decision_definitions", [])
         initialized_points = self._initialize_decision_points()
         existing_names = {dp.name for dp in initialized_points}
@@ -38,7 +204,7 @@ class DecisionHandler:
                     existing_names.add(custom_def.get("name"))
                 except TypeError as e:
                     logger.error(f"Error loading custom decision definition '{custom_def.get('name')}': {e}. Ensure keys match DecisionPoint constructor.")
-        self.decision_points = initialized_points
+        return initialized_points
         
     def _load_preferences(self) -> Dict[str, Any]:
         if self.preferences_file.exists():
@@ -51,13 +217,34 @@ class DecisionHandler:
                 logger.error(f"Error loading preferences from {self.preferences_file}: {e}. Initializing fresh preferences.")
         return {"decisions": {}, "custom_decision_definitions": []} 
     
+    def _merge_saved_preferences(self):
+        # Batch workers each hold their own copy of the file; fold in what others saved so the last writer keeps it.
+        if not self.preferences_file.exists(): return
+        on_disk = self._load_preferences()
+        self.preferences["decisions"] = {**on_disk.get("decisions", {}), **self._unsaved_decisions}
+        own_names = {d.get("name") for d in self.preferences.get("custom_decision_definitions", [])}
+        self.preferences["custom_decision_definitions"] = self.preferences.get("custom_decision_definitions", []) + \
+            [d for d in on_disk.get("custom_decision_definitions", []) if d.get("name") not in own_names]
+
     def _save_preferences(self):
+        # One write of the serialized blob to a private temp file, renamed into place, so readers never see a torn file.
+        tmp_path = self.preferences_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
         try:
-            with open(self.preferences_file, 'w', encoding='utf-8') as f:
-                json.dump(self.preferences, f, indent=2)
+            self._merge_saved_preferences()
+            payload = json.dumps(self.preferences, indent=2).encode('utf-8')
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.preferences_file)
+            self._dirty = False
+            self._unsaved_decisions.clear()
+            self._last_flush = time.monotonic()
             logger.info(f"Preferences saved to {self.preferences_file}")
         except Exception as e:
             logger.error(f"Error saving preferences: {e}")
+            try: tmp_path.unlink()
+            except OSError: pass
     
     def _initialize_decision_points(self) -> List[DecisionPoint]:
         return [
@@ -75,8 +262,8 @@ class DecisionHandler:
                         "selectors": [
                             "a[data-automation-id='autofillWithResume']",      
                             "button[data-automation-id='autofillWithResume']", 
-                            "button:text-matches('(?i)autofill.*resume')",
-                            "a:text-matches('(?i)autofill.*resume')",
+                            "button:text-matches('autofill.*resume', 'i')",
+                            "a:text-matches('autofill.*resume', 'i')",
                             "[aria-label*='Autofill with Resume' i]"
                         ],
                         "preferred": True 
@@ -119,9 +306,9 @@ class DecisionHandler:
                         "selectors": [
                             "button[data-automation-id*='continue' i]", 
                             "button[data-automation-id*='next' i]",
-                            "button:has-text('Continue' i)", 
-                            "button:has-text('Next' i)",
-                            "button:text-matches('(?i)save.*continue')"
+                            "button:has-text('Continue')", 
+                            "button:has-text('Next')",
+                            "button:text-matches('save.*continue', 'i')"
                             ],
                         "preferred": True
                     }
@@ -129,57 +316,84 @@ class DecisionHandler:
             )
         ]
     
+    @cached_property
+    def _dp_by_url_fragment(self) -> Dict[str, List[DecisionPoint]]:
+        index: Dict[str, List[DecisionPoint]] = {}
+        for dp in self.decision_points:
+            for pattern in dp._lower_url_patterns:
+                index.setdefault(pattern, []).append(dp)
+        return index
+
+    def _cached_content(self, page: Page) -> str:
+        url = page.url
+        cached_url, fetched_at, content = self._content_cache
+        if cached_url == url and time.monotonic() - fetched_at < _CONTENT_CACHE_TTL_S:
+            return content
+        content = page.content()
+        self._content_cache = (url, time.monotonic(), content)
+        return content
+
+    @cached_property
+    def _global_probe_criteria(self) -> List[Tuple[str, Tuple[str, ...]]]:
+        # Every distinct criterion any handler checks, so one evaluate can answer them all.
+        criteria = [(_METHOD_SELECTION_INDICATOR_PATTERN, ())]
+        for dp in self.decision_points:
+            key = (dp._text_indicator_regex.pattern if dp._text_indicator_regex else "", dp._lower_button_texts)
+            if key not in criteria: criteria.append(key)
+        return criteria
+
+    def prime_probe_cache(self, page: Page) -> List[Tuple[bool, int]]:
+        """Answer every known decision criterion in one page.evaluate so the handlers that follow read cached results."""
+        criteria = self._global_probe_criteria
+        results = _probe_batch(page, criteria)
+        self._sync_probe_url(page.url)
+        now = time.monotonic()
+        for key, result in zip(criteria, results):
+            self._probe_cache[key] = (now, result)
+        return results
+
+    def has_decision_signal(self, page: Page) -> bool:
+        """False only when no known decision point (built-in or custom) can match: detection needs a URL-pattern or
+        indicator-text hit, so without either the full check can be skipped. Costs the one batched probe."""
+        try:
+            current_url = page.url.lower()
+            if any(fragment in current_url for fragment in self._dp_by_url_fragment): return True
+            return any(text_match for text_match, _ in self.prime_probe_cache(page))
+        except Exception as e:
+            logger.debug(f"Decision signal probe failed; assuming a decision point may be present: {e}")
+            return True
+
+    def _sync_probe_url(self, url: str):
+        if url != self._probe_url:
+            self._probe_cache.clear()
+            self._probe_url = url
+
+    def _cached_probe(self, page: Page, text_pattern: str, button_texts: Tuple[str, ...] = ()) -> Tuple[bool, int]:
+        self._sync_probe_url(page.url)
+        now = time.monotonic()
+        key = (text_pattern, button_texts)
+        cached = self._probe_cache.get(key)
+        if cached and now - cached[0] < _CONTENT_CACHE_TTL_S:
+            return cached[1]
+        result = _probe_page(page, text_pattern, button_texts)
+        self._probe_cache[key] = (now, result)
+        return result
+
     def detect_decision_point(self, page: Page) -> Optional[DecisionPoint]:
         try:
             current_url = page.url.lower()
             logger.debug(f"Detecting decision point for URL: {current_url}")
 
-            for dp_idx, decision_point in enumerate(self.decision_points):
-                criteria = decision_point.detection_criteria
-                logger.debug(f"Checking DecisionPoint {dp_idx}: {decision_point.name}")
+            # URL-matched points are checked first, then those allowed to match on text alone; URL-gated misses never reach a locator.
+            url_matched: List[DecisionPoint] = []
+            for fragment, dps in self._dp_by_url_fragment.items():
+                if fragment in current_url:
+                    url_matched.extend(dp for dp in dps if dp not in url_matched)
+            candidates = url_matched + [dp for dp in self.decision_points if dp not in url_matched and not dp._require_url_match]
 
-                url_match = any(pattern.lower() in current_url for pattern in criteria.get("url_patterns", []))
-                
-                text_match = False
-                text_indicators = criteria.get("text_indicators", [])
-                if text_indicators:
-                    for indicator_text in text_indicators:
-                        try:
-                            if page.locator(f"*:text-matches('{re.escape(indicator_text)}', 'i')").count() > 0:
-                                text_match = True
-                                logger.debug(f"  Text indicator '{indicator_text}' found for {decision_point.name}.")
-                                break
-                        except Exception as e_loc:
-                            logger.debug(f"  Error with text indicator locator for '{indicator_text}': {e_loc}")
-                
-                if not text_match and text_indicators: 
-                    try:
-                        page_content_lower = page.content(timeout=2000).lower() 
-                        text_match = any(indicator.lower() in page_content_lower for indicator in text_indicators)
-                        if text_match: logger.debug(f"  Text indicator found via page.content() for {decision_point.name}.")
-                    except TimeoutError: # USE CORRECTED EXCEPTION NAME
-                        logger.warning("Timeout getting page.content() in detect_decision_point")
-                    except Exception as e_content:
-                        logger.warning(f"Error getting page.content() in detect_decision_point: {e_content}")
-
-                button_options_texts = criteria.get("button_options_texts", [])
-                actual_buttons_found_count = 0
-                if button_options_texts:
-                    for btn_txt in button_options_texts:
-                        try:
-                            if page.locator(f"button:has-text('{re.escape(btn_txt)}' i), a[role='button']:has-text('{re.escape(btn_txt)}' i), [data-automation-id*='button']:has-text('{re.escape(btn_txt)}' i)").count() > 0:
-                                actual_buttons_found_count += 1
-                        except Exception as e_btn_loc:
-                             logger.debug(f"  Error with button option locator for '{btn_txt}': {e_btn_loc}")
-                
-                strong_indicator_match = url_match or text_match
-                buttons_criterion_met = True 
-                if button_options_texts:
-                    required_buttons = max(1, len(button_options_texts) // 2) 
-                    buttons_criterion_met = actual_buttons_found_count >= required_buttons
-                    logger.debug(f"  For {decision_point.name}: URLMatch={url_match}, TextMatch={text_match}, ButtonsFound={actual_buttons_found_count}/{len(button_options_texts)}, CriterionMet={buttons_criterion_met}")
-
-                if strong_indicator_match and buttons_criterion_met:
+            for dp_idx, decision_point in enumerate(candidates):
+                logger.debug(f"Checking DecisionPoint {dp_idx}: {decision_point.name}")
+                if decision_point._detect(self, page, dp_idx < len(url_matched)):
                     logger.info(f"Detected decision point: {decision_point.name}")
                     return decision_point
                             
@@ -193,62 +407,68 @@ class DecisionHandler:
     def store_decision(self, decision_name: str, choice_name: str):
         if "decisions" not in self.preferences:
             self.preferences["decisions"] = {}
+        if self.preferences["decisions"].get(decision_name) == choice_name: return
         self.preferences["decisions"][decision_name] = choice_name
-        self._save_preferences()
+        self._unsaved_decisions[decision_name] = choice_name
+        self._dirty = True
+        if time.monotonic() - self._last_flush > _PREFERENCES_FLUSH_INTERVAL_S:
+            self._save_preferences()
+
+    def flush(self):
+        if self._dirty: self._save_preferences()
+
+    def __del__(self):
+        # Handlers dropped before exit (e.g. the wrapper's throwaway instance) leave the weak set, so flush here.
+        try: self.flush()
+        except Exception: pass
     
     def handle_decision_point(self, page: Page, decision_point: DecisionPoint, auto_select: bool = True) -> bool:
         try:
             logger.info(f"Handling decision point: {decision_point.name}")
             stored_choice_name = self.get_stored_decision(decision_point.name)
-            selected_option_definition = None
+            selected_option_definition = decision_point._options_by_name.get(stored_choice_name) if stored_choice_name else None
 
             if stored_choice_name:
-                for option_def in decision_point.options:
-                    if option_def["name"] == stored_choice_name:
-                        selected_option_definition = option_def
-                        break
                 if selected_option_definition:
                     logger.info(f"Using stored preference: '{stored_choice_name}' for decision '{decision_point.name}'")
                 else:
                     logger.warning(f"Stored preference '{stored_choice_name}' for '{decision_point.name}' not found in current options. Will try default.")
 
             if not selected_option_definition and auto_select:
-                for option_def in decision_point.options:
-                    if option_def.get("preferred", False):
-                        selected_option_definition = option_def
-                        break
+                selected_option_definition = decision_point._default_option
                 if selected_option_definition:
                     logger.info(f"Using default preferred option: '{selected_option_definition['name']}' for '{decision_point.name}'")
             
             if not selected_option_definition:
                 logger.warning(f"No stored or default preferred option to select for '{decision_point.name}'. Manual intervention likely needed if script doesn't proceed.")
-                try:
-                    page.screenshot(path=f"debug_decision_point_no_pref_{decision_point.name}.png", full_page=True)
-                except Exception as e_ss: logger.error(f"Failed to save no_pref screenshot: {e_ss}")
+                if _DEBUG_SCREENSHOTS:
+                    try:
+                        _debug_screenshot(page, f"debug_decision_point_no_pref_{decision_point.name}.jpg")
+                    except Exception as e_ss: logger.error(f"Failed to save no_pref screenshot: {e_ss}")
                 return False 
             
             clicked_successfully = False
-            for selector in selected_option_definition["selectors"]:
-                try:
-                    elements = page.locator(selector).all()
-                    for element in elements:
-                        if element.is_visible(timeout=1000) and element.is_enabled(timeout=1000): 
-                            logger.info(f"Clicking option: '{selected_option_definition['name']}' with selector: {selector}")
-                            element.click(timeout=3000) 
-                            self.store_decision(decision_point.name, selected_option_definition["name"])
-                            page.wait_for_timeout(3000) # Increased wait after click
-                            clicked_successfully = True
-                            return True 
-                except TimeoutError: # USE CORRECTED EXCEPTION NAME
-                    logger.debug(f"Option selector '{selector}' for '{selected_option_definition['name']}' not interactable or click timed out.")
-                except Exception as e:
-                    logger.debug(f"Failed attempt with selector '{selector}' for option '{selected_option_definition['name']}': {e}")
+            selector = decision_point._option_union_selectors.get(selected_option_definition["name"])
+            try:
+                element = _first_visible(page, selector) if selector else None
+                if element is not None:
+                    logger.info(f"Clicking option: '{selected_option_definition['name']}' with selector: {selector}")
+                    element.click(timeout=_OPTION_CLICK_TIMEOUT_MS) 
+                    self.store_decision(decision_point.name, selected_option_definition["name"])
+                    _wait_after_option_click(page, selected_option_definition)
+                    clicked_successfully = True
+                    return True 
+            except TimeoutError: # USE CORRECTED EXCEPTION NAME
+                logger.debug(f"Option '{selected_option_definition['name']}' not interactable or click timed out.")
+            except Exception as e:
+                logger.debug(f"Failed attempt to click option '{selected_option_definition['name']}': {e}")
             
             if not clicked_successfully:
                 logger.warning(f"Could not click any selector for preferred/stored option: '{selected_option_definition['name']}' in decision '{decision_point.name}'")
-                try:
-                    page.screenshot(path=f"debug_decision_click_failed_{decision_point.name}_{selected_option_definition['name']}.png", full_page=True)
-                except Exception as e_ss: logger.error(f"Failed to save click_failed screenshot: {e_ss}")
+                if _DEBUG_SCREENSHOTS:
+                    try:
+                        _debug_screenshot(page, f"debug_decision_click_failed_{decision_point.name}_{selected_option_definition['name']}.jpg")
+                    except Exception as e_ss: logger.error(f"Failed to save click_failed screenshot: {e_ss}")
             return False
             
         except Exception as e:
@@ -261,6 +481,8 @@ class DecisionHandler:
         new_decision = DecisionPoint(name, description, detection_criteria, options)
         if not any(dp.name == name for dp in self.decision_points):
             self.decision_points.append(new_decision)
+            self.__dict__.pop('_dp_by_url_fragment', None)
+            self.__dict__.pop('_global_probe_criteria', None)
             logger.info(f"Added custom decision point to current session: {name}")
         else:
             logger.info(f"Custom decision point '{name}' already exists in session. Updating if definition differs (not implemented yet).")
@@ -280,20 +502,15 @@ class DecisionHandler:
         logger.info("Script encountered an unrecognized situation that might be a new decision point.")
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        screenshot_path = f"new_unrecognized_decision_{timestamp}.png"
+        screenshot_path = f"new_unrecognized_decision_{timestamp}.jpg"
         try:
-            page.screenshot(path=screenshot_path, full_page=True)
+            _debug_screenshot(page, screenshot_path)
             logger.info(f"Screenshot of unrecognized page saved: {screenshot_path}")
         except Exception as e: logger.error(f"Failed to save screenshot for new decision point: {e}")
         
         buttons_texts = []
         try:
-            candidate_elements = page.locator("button:visible, a[role='button']:visible, [data-automation-id*='button']:visible, [data-automation-id*='action']:visible").all()
-            for el_idx, btn_el in enumerate(candidate_elements):
-                if el_idx > 15: break 
-                text = (btn_el.text_content() or btn_el.get_attribute("aria-label") or btn_el.get_attribute("data-automation-id") or f"Element_{el_idx}").strip()
-                if text and len(text) < 70 : 
-                    buttons_texts.append(text)
+            buttons_texts = page.locator(_CLICKABLE_CANDIDATES_SELECTOR).evaluate_all(_CLICKABLE_LABELS_JS)
         except Exception as e_btn: logger.warning(f"Could not list buttons for interactive setup: {e_btn}")
 
         if buttons_texts:
@@ -306,82 +523,77 @@ class DecisionHandler:
         logger.info("For now, you might need to manually interact with the browser to proceed past this unrecognized state if the script is stuck.")
         return None
 
-def handle_application_method_selection(page: Page) -> bool:
-    try:
-        logger.info("Attempting specific handler: handle_application_method_selection for Workday-like 'Apply Options' page")
-        text_indicators_present = False
-        indicators = ["Start Your Application", "Please select how you would like to apply", "How would you like to apply?"]
-        for indicator_text in indicators:
+    def handle_application_method_selection(self, page: Page) -> bool:
+        try:
+            logger.info("Attempting specific handler: handle_application_method_selection for Workday-like 'Apply Options' page")
+            text_indicators_present = False
             try: 
-                if page.locator(f"*:text-matches('{re.escape(indicator_text)}', 'i')").count() > 0: # Use re.escape
-                    text_indicators_present = True
-                    logger.debug(f"Specific handler: Text indicator '{indicator_text}' found.")
-                    break
+                text_indicators_present = self._cached_probe(page, _METHOD_SELECTION_INDICATOR_PATTERN)[0]
             except Exception as e_loc_text:
-                logger.debug(f"Error checking text indicator '{indicator_text}': {e_loc_text}")
+                logger.debug(f"Error checking method selection text indicators: {e_loc_text}")
 
-        if not text_indicators_present:
-            logger.debug("Specific handler: Application method selection page indicators not strongly detected by locators. Will not proceed with this specific handler.")
-            return False 
+            if not text_indicators_present:
+                logger.debug("Specific handler: Application method selection page indicators not strongly detected by locators. Will not proceed with this specific handler.")
+                return False 
 
-        logger.info("Specific handler: Application method selection page detected by text indicators.")
-        autofill_option_selectors = [
-            "a[data-automation-id='autofillWithResume']",      
-            "button[data-automation-id='autofillWithResume']", 
-            "a[data-automation-id='autoFillResumeButton']", 
-            "button[data-automation-id='autoFillResumeButton']",
-            "button:text-matches('(?i)autofill.*resume')", 
-            "a:text-matches('(?i)autofill.*resume')",     
-            "[aria-label*='Autofill with Resume' i]",
-        ]
-        
-        for selector in autofill_option_selectors:
+            logger.info("Specific handler: Application method selection page detected by text indicators.")
             try:
-                elements = page.locator(selector).all() 
-                for element in elements:
-                    if element.is_visible(timeout=1000) and element.is_enabled(timeout=1000):
-                        logger.info(f"Specific handler: Found 'Autofill with Resume' option with selector: {selector}")
-                        element.click(timeout=3000)
-                        logger.info("Specific handler: Clicked 'Autofill with Resume'")
-                        page.wait_for_timeout(3000) 
-                        return True 
+                element = _first_visible(page, _AUTOFILL_OPTION_SELECTOR)
+                if element is not None:
+                    logger.info("Specific handler: Found 'Autofill with Resume' option.")
+                    element.click(timeout=_OPTION_CLICK_TIMEOUT_MS)
+                    logger.info("Specific handler: Clicked 'Autofill with Resume'")
+                    _wait_after_option_click(page)
+                    return True 
             except TimeoutError: # USE CORRECTED EXCEPTION NAME
-                 logger.debug(f"Specific handler: Selector '{selector}' for Autofill not visible/enabled in time.")
+                 logger.debug("Specific handler: Autofill option not visible/enabled in time.")
             except Exception as e:
-                logger.debug(f"Specific handler: Error with selector '{selector}' for Autofill: {e}")
+                logger.debug(f"Specific handler: Error clicking Autofill option: {e}")
         
-        logger.warning("Specific handler: Could not find or click 'Autofill with Resume' after trying all selectors.")
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            page.screenshot(path=f"decision_autofill_fail_{timestamp}.png", full_page=True)
-            logger.info(f"Screenshot saved: decision_autofill_fail_{timestamp}.png")
-        except Exception as e_ss: logger.error(f"Failed to save decision_autofill_fail screenshot: {e_ss}")
-        return False 
+            logger.warning("Specific handler: Could not find or click 'Autofill with Resume'.")
+            if _DEBUG_SCREENSHOTS:
+                try:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    _debug_screenshot(page, f"decision_autofill_fail_{timestamp}.jpg")
+                    logger.info(f"Screenshot saved: decision_autofill_fail_{timestamp}.jpg")
+                except Exception as e_ss: logger.error(f"Failed to save decision_autofill_fail screenshot: {e_ss}")
+            return False 
         
-    except Exception as e:
-        logger.error(f"Error in handle_application_method_selection: {e}", exc_info=True)
-        return False
+        except Exception as e:
+            logger.error(f"Error in handle_application_method_selection: {e}", exc_info=True)
+            return False
 
-def check_and_handle_decision_points(page: Page, decision_handler_instance: DecisionHandler) -> bool: 
-    try:
-        if handle_application_method_selection(page): 
-            logger.info("Application method selection handled by specific function.")
-            return True
-                
-        logger.info("No specific handler acted or was applicable for current page. Trying general DecisionHandler detection.")
-        decision_point_obj = decision_handler_instance.detect_decision_point(page) 
-        if decision_point_obj:
-            logger.info(f"General DecisionHandler detected: {decision_point_obj.name}")
-            if decision_handler_instance.handle_decision_point(page, decision_point_obj):
-                logger.info(f"General DecisionHandler successfully handled: {decision_point_obj.name}")
+    def check_and_handle_decision_points(self, page: Page) -> bool: 
+        try:
+            try:
+                self.prime_probe_cache(page)
+            except Exception as e_probe:
+                logger.debug(f"Batch decision probe failed; handlers will probe individually: {e_probe}")
+            if self.handle_application_method_selection(page): 
+                logger.info("Application method selection handled by specific function.")
                 return True
-            else:
-                logger.warning(f"General DecisionHandler detected '{decision_point_obj.name}' but could not resolve it automatically.")
-                return False 
+                
+            logger.info("No specific handler acted or was applicable for current page. Trying general DecisionHandler detection.")
+            decision_point_obj = self.detect_decision_point(page) 
+            if decision_point_obj:
+                logger.info(f"General DecisionHandler detected: {decision_point_obj.name}")
+                if self.handle_decision_point(page, decision_point_obj):
+                    logger.info(f"General DecisionHandler successfully handled: {decision_point_obj.name}")
+                    return True
+                else:
+                    logger.warning(f"General DecisionHandler detected '{decision_point_obj.name}' but could not resolve it automatically.")
+                    return False 
         
-        logger.info("No known decision points detected by general DecisionHandler or specific handlers.")
-        return False 
+            logger.info("No known decision points detected by general DecisionHandler or specific handlers.")
+            return False 
             
-    except Exception as e:
-        logger.error(f"Critical error in check_and_handle_decision_points: {e}", exc_info=True)
-        return False
+        except Exception as e:
+            logger.error(f"Critical error in check_and_handle_decision_points: {e}", exc_info=True)
+            return False
+
+# Module-level entry points kept for existing callers; both delegate to the handler so they share its probe cache.
+def handle_application_method_selection(page: Page, decision_handler_instance: Optional[DecisionHandler] = None) -> bool:
+    return (decision_handler_instance or DecisionHandler()).handle_application_method_selection(page)
+
+def check_and_handle_decision_points(page: Page, decision_handler_instance: DecisionHandler) -> bool: 
+    return decision_handler_instance.check_and_handle_decision_points(page)
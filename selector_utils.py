@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Selector String Helpers for Form Filler
+Pure string predicates used when building robust selectors. Kept free of Playwright
+and dynamic typing so the module can be compiled in place with mypyc.
+"""
+
+import re
+from typing import Optional
+
+_HASH_RE = re.compile(r'^[a-f0-9-]{20,}$')
+_GENERATED_CLASS_PREFIXES = ('css-', 'sc-', 'styled__', 'style-', 'ember', 'm-', 'p-', 'w-', 'h-')
+_GENERIC_CLASS_NAMES = frozenset({'input', 'form-control', 'field', 'button', 'label', 'active', 'focus'})
+
+def is_opaque_id(val: str) -> bool:
+    """True for numeric or hash-like values that are unstable across page loads."""
+    return val.isnumeric() or _HASH_RE.match(val) is not None
+
+def choose_class_token(class_attr: str) -> Optional[str]:
+    """First class name that is neither framework-generated nor too generic to be useful."""
+    for c in class_attr.split():
+        if len(c) > 3 and not c.startswith(_GENERATED_CLASS_PREFIXES) and c not in _GENERIC_CLASS_NAMES:
+            return c
+    return None
@@ -0,0 +1,96 @@
+"""Every joined selector constant must parse with Playwright's own selector parser.
+
+A comma union fails as a whole when one member is invalid, so a single bad member silently disables
+every locator built from it. The parser and the driver's node binary ship with the playwright wheel;
+:text-matches arguments are additionally compiled with JS RegExp, as the injected script does at match time.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import playwright
+import autofill_ai_vision_multistep as filler
+import decision_handler
+
+_DRIVER_DIR = Path(playwright.__file__).resolve().parent / "driver"
+_CORE_BUNDLE = _DRIVER_DIR / "package" / "lib" / "coreBundle.js"
+_NODE = next((str(p) for p in (_DRIVER_DIR / "node", _DRIVER_DIR / "node.exe") if p.exists()), None) or shutil.which("node")
+
+_CHECK_JS = """
+const { iso } = require(process.argv[2]);
+const selectors = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const regexArgs = (node, out) => {
+    if (Array.isArray(node)) node.forEach(n => regexArgs(n, out));
+    else if (node && typeof node === 'object') {
+        if (node.name === 'text-matches' && Array.isArray(node.args)) out.push(node.args);
+        Object.values(node).forEach(v => regexArgs(v, out));
+    }
+    return out;
+};
+const errors = {};
+for (const s of selectors) {
+    try {
+        for (const [source, flags] of regexArgs(iso.parseSelector(s), [])) new RegExp(source, flags || '');
+    } catch (e) { errors[s] = e.message; }
+}
+console.log(JSON.stringify(errors));
+"""
+
+pytestmark = pytest.mark.skipif(not (_NODE and _CORE_BUNDLE.exists()), reason="Playwright driver bundle or node not available")
+
+
+def _selector_errors(selectors):
+    with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False) as f:
+        f.write(_CHECK_JS)
+    try:
+        out = subprocess.run([_NODE, f.name, str(_CORE_BUNDLE)], input=json.dumps(list(selectors)),
+                             capture_output=True, text=True, check=True).stdout
+    finally:
+        os.unlink(f.name)
+    return json.loads(out)
+
+
+def _decision_handler_selectors():
+    handler = decision_handler.DecisionHandler(os.path.join(tempfile.mkdtemp(), "prefs.json"))
+    yield ", ".join(decision_handler.DECISION_PAGE_SELECTORS)
+    yield f"{decision_handler._AUTOFILL_OPTION_SELECTOR} >> visible=true"
+    yield decision_handler._CLICKABLE_CANDIDATES_SELECTOR
+    for dp in handler.decision_points:
+        for union in dp._option_union_selectors.values():
+            yield f"{union} >> visible=true"
+
+
+def test_decision_handler_selectors_parse():
+    assert _selector_errors(_decision_handler_selectors()) == {}
+
+
+def test_login_selectors_parse():
+    assert _selector_errors([filler._APPLY_SELECTOR, filler._EMAIL_SELECTOR, filler._NEXT_BUTTON_SELECTOR,
+                             filler._PASSWORD_SELECTOR, filler._SIGNIN_SELECTOR, filler._CREATE_ACCOUNT_SELECTOR]) == {}
+
+
+def test_generic_next_selector_parses():
+    assert _selector_errors([filler._GENERIC_NEXT_SELECTOR]) == {}
+
+
+def test_submit_fallback_selector_parses():
+    assert _selector_errors([filler._SUBMIT_FALLBACK_SELECTOR]) == {}
+
+
+def test_popup_close_selector_parses():
+    assert _selector_errors([filler._POPUP_CLOSE_SELECTOR]) == {}
+
+
+def test_interrupt_snapshot_selector_parses():
+    # The snapshot splits its results with el.matches(captchaSel), which only understands plain CSS.
+    assert ":" not in filler._CAPTCHA_SELECTOR
+    assert _selector_errors([f"{filler._CAPTCHA_SELECTOR}, {filler._POPUP_CLOSE_SELECTOR}"]) == {}